@@ -0,0 +1,7 @@
+"""
+Benchmarks of the auth hot paths: password hashing, JWT encoding and decoding,
+response serialization and end-to-end requests.
+
+Run with: python -m benchmarks run --output benchmarks/results/baseline.json
+Compare with: python -m benchmarks compare <baseline.json> <current.json>
+"""
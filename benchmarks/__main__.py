@@ -0,0 +1,88 @@
+"""
+Run benchmarks and compare results against a baseline.
+
+Run with: python -m benchmarks <command> [options]
+"""
+import argparse
+import sys
+from typing import List
+
+from benchmarks import (  # noqa: F401  (registration)
+    auth,
+    endpoints,
+    serialization,
+)
+from benchmarks.runner import BENCHMARKS, Baseline, Comparison, compare, run
+
+
+def report(comparisons: List[Comparison], threshold: float) -> int:
+    """
+    Print the comparisons, returning the exit status: 1 if any benchmark regressed.
+    """
+    print(f"{'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>8}")
+    for comparison in comparisons:
+        print(comparison)
+    regressions = [comparison.name for comparison in comparisons if comparison.regressed]
+    if regressions:
+        print(f"Slower by more than {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maize API benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks")
+    run_parser.add_argument(
+        "names",
+        nargs="*",
+        help=f"Benchmarks to run, all by default: {', '.join(BENCHMARKS)}",
+    )
+    run_parser.add_argument("--output", help="Save the results as JSON to this file")
+    run_parser.add_argument(
+        "--baseline", help="Compare the results with the baseline in this file"
+    )
+    run_parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Minimal duration of a timed round in seconds",
+    )
+    run_parser.add_argument(
+        "--rounds", type=int, default=5, help="Timed rounds per benchmark"
+    )
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Compare saved results with a baseline"
+    )
+    compare_parser.add_argument("baseline", help="Baseline results file")
+    compare_parser.add_argument("current", help="Results file to check")
+
+    for subparser in (run_parser, compare_parser):
+        subparser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Throughput drop counted as a regression, e.g. 0.1 for 10%%",
+        )
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        unknown = set(args.names) - set(BENCHMARKS)
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+        current = run(args.names or None, min_time=args.min_time, rounds=args.rounds)
+        if args.output:
+            current.save(args.output)
+        if args.baseline:
+            baseline = Baseline.load(args.baseline)
+            sys.exit(report(compare(baseline, current, args.threshold), args.threshold))
+    elif args.command == "compare":
+        baseline, current = Baseline.load(args.baseline), Baseline.load(args.current)
+        sys.exit(report(compare(baseline, current, args.threshold), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
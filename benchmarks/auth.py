@@ -0,0 +1,64 @@
+"""
+Password hashing and JWT benchmarks.
+"""
+from functools import partial
+from typing import AsyncIterator
+from uuid import uuid4
+
+from benchmarks.runner import Operation, benchmark
+from src.deps import token_cache, verify_token
+from src.JWT import JWTToken
+from src.settings import pwd_cxt
+
+PASSWORD = "String123"
+
+
+@benchmark("password.hash")
+async def password_hash() -> AsyncIterator[Operation]:
+    """
+    Hash a password at the configured bcrypt cost.
+    """
+    yield lambda: pwd_cxt.hash(PASSWORD)
+
+
+@benchmark("password.verify")
+async def password_verify() -> AsyncIterator[Operation]:
+    """
+    Verify a password at the configured bcrypt cost.
+    """
+    hashed_password = pwd_cxt.hash(PASSWORD)
+    yield lambda: pwd_cxt.verify(PASSWORD, hashed_password)
+
+
+@benchmark("jwt.encode")
+async def jwt_encode() -> AsyncIterator[Operation]:
+    """
+    Create an access token.
+    """
+    token = JWTToken(uuid4())
+    yield token.get_access_token
+
+
+@benchmark("jwt.verify")
+async def jwt_verify() -> AsyncIterator[Operation]:
+    """
+    Decode and validate an access token, bypassing the token cache.
+    """
+    access_token = JWTToken(uuid4()).get_access_token()
+
+    async def verify() -> None:
+        token_cache.clear()
+        await verify_token(access_token)
+
+    yield verify
+    token_cache.clear()
+
+
+@benchmark("jwt.verify_cached")
+async def jwt_verify_cached() -> AsyncIterator[Operation]:
+    """
+    Validate an access token found in the token cache.
+    """
+    access_token = JWTToken(uuid4()).get_access_token()
+    yield partial(verify_token, access_token)
+    token_cache.clear()
@@ -0,0 +1,129 @@
+"""
+End-to-end request benchmarks, sending requests to the application through
+httpx.ASGITransport. They run against a bench_<DB_NAME> database created for each
+benchmark and dropped afterwards. Requests are sent one at a time, so the
+throughput is the inverse of the latency of a request in a single worker.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple
+
+from httpx import ASGITransport, AsyncClient, Response
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.auth import PASSWORD
+from benchmarks.runner import Operation, benchmark
+from src.deps import get_db, get_read_db, token_cache, user_cache
+from src.JWT import JWTToken
+from src.main import app
+from src.models import Profile, User
+from src.settings import engine, pwd_cxt, settings
+
+BENCH_DB_NAME = f"bench_{settings.DB_NAME}"
+
+
+async def execute_autocommit(statement: str) -> None:
+    """
+    Execute a statement outside of a transaction on the application database.
+    """
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text(statement))
+    await engine.dispose()
+
+
+@asynccontextmanager
+async def bench_client() -> AsyncIterator[Tuple[AsyncClient, User]]:
+    """
+    Create the benchmark database with an active user and its profile, and route
+    the database sessions of the application to it.
+
+    Yields:
+        Tuple[AsyncClient, User]: Client sending requests to the application and
+            the user.
+    """
+    await execute_autocommit(f"DROP DATABASE IF EXISTS {BENCH_DB_NAME} WITH (FORCE)")
+    await execute_autocommit(f"CREATE DATABASE {BENCH_DB_NAME}")
+    bench_engine = create_async_engine(
+        make_url(settings.postgres_url).set(database=BENCH_DB_NAME),
+        **settings.engine_options,
+    )
+    bench_session = async_sessionmaker(
+        bind=bench_engine, expire_on_commit=False, class_=AsyncSession
+    )
+
+    async def get_bench_db() -> AsyncIterator[AsyncSession]:
+        async with bench_session() as session:
+            yield session
+
+    try:
+        async with bench_engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with bench_session() as session:
+            user = User(
+                email="bench@example.com",
+                password=pwd_cxt.hash(PASSWORD),
+                is_active=True,
+            )
+            profile = Profile(user=user, username="bench", picture="media/bench.svg")
+            session.add_all((user, profile))
+            await session.commit()
+
+        user_cache.clear()
+        token_cache.clear()
+        app.dependency_overrides[get_db] = get_bench_db
+        app.dependency_overrides[get_read_db] = get_bench_db
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://127.0.0.1"
+        ) as client:
+            yield client, user
+    finally:
+        app.dependency_overrides.clear()
+        user_cache.clear()
+        token_cache.clear()
+        await bench_engine.dispose()
+        await execute_autocommit(f"DROP DATABASE IF EXISTS {BENCH_DB_NAME} WITH (FORCE)")
+
+
+def check(response: Response) -> None:
+    """
+    Fail the benchmark on error responses, which would make it meaningless.
+    """
+    response.raise_for_status()
+
+
+@benchmark("http.login")
+async def login() -> AsyncIterator[Operation]:
+    async with bench_client() as (client, user):
+        data = {"username": user.email, "password": PASSWORD}
+
+        async def request() -> None:
+            check(await client.post("/auth/login", data=data))
+
+        yield request
+
+
+@benchmark("http.refresh")
+async def refresh() -> AsyncIterator[Operation]:
+    async with bench_client() as (client, user):
+        headers = {"Authorization": f"Bearer {JWTToken(user.id).get_refresh_token()}"}
+
+        async def request() -> None:
+            check(await client.post("/auth/refresh", headers=headers))
+
+        yield request
+
+
+@benchmark("http.profile")
+async def profile() -> AsyncIterator[Operation]:
+    async with bench_client() as (client, user):
+        headers = {"Authorization": f"Bearer {JWTToken(user.id).get_access_token()}"}
+        url = f"/profile/{user.id}"
+
+        async def request() -> None:
+            check(await client.get(url, headers=headers))
+
+        yield request
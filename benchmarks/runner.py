@@ -0,0 +1,241 @@
+"""
+Benchmark registry, timing and baselines.
+
+A benchmark is an async generator function registered with @benchmark. It sets
+up its state, yields the operation to time (a function or a coroutine function
+without arguments) and tears down after the generator is resumed.
+"""
+import asyncio
+import inspect
+import platform
+import statistics
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Union,
+)
+
+from pydantic import BaseModel
+
+Operation = Callable[[], Union[Any, Awaitable[Any]]]
+BenchmarkFactory = Callable[[], AsyncIterator[Operation]]
+
+BENCHMARKS: Dict[str, BenchmarkFactory] = {}
+
+
+def benchmark(name: str) -> Callable[[BenchmarkFactory], BenchmarkFactory]:
+    """
+    Register a benchmark under a name, e.g. "jwt.encode".
+    """
+
+    def register(factory: BenchmarkFactory) -> BenchmarkFactory:
+        BENCHMARKS[name] = factory
+        return factory
+
+    return register
+
+
+class BenchmarkResult(BaseModel):
+    """
+    Model representing the timings of a benchmark.
+
+    Attributes:
+        ops_per_sec (float): Median throughput over the rounds.
+        mean (float): Mean seconds per operation.
+        stdev (float): Standard deviation of the seconds per operation of the rounds.
+        rounds (int): Number of timed rounds.
+        iterations (int): Operations per round.
+    """
+
+    ops_per_sec: float
+    mean: float
+    stdev: float
+    rounds: int
+    iterations: int
+
+
+class Baseline(BaseModel):
+    """
+    Model representing a saved benchmark run.
+
+    Attributes:
+        created_at (datetime): When the benchmarks were run.
+        machine (Dict[str, str]): Python version and platform of the run, results of
+            different machines are not comparable.
+        results (Dict[str, BenchmarkResult]): Timings by benchmark name.
+    """
+
+    created_at: datetime
+    machine: Dict[str, str]
+    results: Dict[str, BenchmarkResult]
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(self.model_dump_json(indent=2))
+
+    @classmethod
+    def load(cls, path: str) -> "Baseline":
+        return cls.model_validate_json(Path(path).read_text())
+
+
+class Comparison(BaseModel):
+    """
+    Model representing the change of a benchmark against the baseline.
+
+    Attributes:
+        name (str): Benchmark name.
+        baseline (float): Operations per second of the baseline.
+        current (float): Operations per second of the current run.
+        change (float): Relative change of the throughput, negative is slower.
+        regressed (bool): Whether the throughput dropped beyond the threshold.
+    """
+
+    name: str
+    baseline: float
+    current: float
+    change: float
+    regressed: bool
+
+    def __str__(self) -> str:
+        flag = "REGRESSION" if self.regressed else ""
+        return (
+            f"{self.name:<28} {self.baseline:>12.1f} {self.current:>12.1f} "
+            f"{self.change:>+8.1%} {flag}"
+        ).rstrip()
+
+
+async def _call(operation: Operation, is_async: bool, iterations: int) -> float:
+    """
+    Run an operation a number of times, returning the elapsed seconds.
+    """
+    start = time.perf_counter()
+    if is_async:
+        for _ in range(iterations):
+            await operation()
+    else:
+        for _ in range(iterations):
+            operation()
+    return time.perf_counter() - start
+
+
+async def measure(operation: Operation, min_time: float, rounds: int) -> BenchmarkResult:
+    """
+    Time an operation. The iterations per round are doubled until a round takes
+    at least min_time, then rounds rounds are timed.
+
+    Args:
+        operation (Operation): Function or coroutine function to time.
+        min_time (float): Minimal duration of a round in seconds.
+        rounds (int): Number of timed rounds.
+
+    Returns:
+        BenchmarkResult: Timings of the operation.
+    """
+    is_async = inspect.iscoroutinefunction(operation)
+    iterations = 1
+    while await _call(operation, is_async, iterations) < min_time:
+        iterations *= 2
+
+    times = [
+        await _call(operation, is_async, iterations) / iterations for _ in range(rounds)
+    ]
+    return BenchmarkResult(
+        ops_per_sec=1 / statistics.median(times),
+        mean=statistics.mean(times),
+        stdev=statistics.stdev(times) if rounds > 1 else 0.0,
+        rounds=rounds,
+        iterations=iterations,
+    )
+
+
+async def run_benchmark(
+    factory: BenchmarkFactory, min_time: float, rounds: int
+) -> BenchmarkResult:
+    """
+    Set up a benchmark, time its operation and tear it down.
+    """
+    setup = factory()
+    operation = await setup.__anext__()
+    try:
+        return await measure(operation, min_time, rounds)
+    finally:
+        with suppress(StopAsyncIteration):
+            await setup.__anext__()
+
+
+def run(
+    names: Optional[List[str]] = None, min_time: float = 0.2, rounds: int = 5
+) -> Baseline:
+    """
+    Run benchmarks, printing every result when it is done.
+
+    Args:
+        names (Optional[List[str]]): Benchmarks to run, all if None.
+        min_time (float): Minimal duration of a round in seconds.
+        rounds (int): Number of timed rounds per benchmark.
+
+    Returns:
+        Baseline: The results.
+    """
+    results: Dict[str, BenchmarkResult] = {}
+
+    async def run_all() -> None:
+        for name, factory in BENCHMARKS.items():
+            if names is None or name in names:
+                results[name] = await run_benchmark(factory, min_time, rounds)
+                result = results[name]
+                print(
+                    f"{name:<28} {result.ops_per_sec:>12.1f} ops/s "
+                    f"(±{result.stdev / result.mean:.1%})"
+                )
+
+    asyncio.run(run_all())
+    return Baseline(
+        created_at=datetime.now(timezone.utc),
+        machine={
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        results=results,
+    )
+
+
+def compare(baseline: Baseline, current: Baseline, threshold: float) -> List[Comparison]:
+    """
+    Compare the throughput of the benchmarks run in both baselines.
+
+    Args:
+        baseline (Baseline): Reference results.
+        current (Baseline): New results.
+        threshold (float): Relative throughput drop counted as a regression,
+            e.g. 0.1 for 10%.
+
+    Returns:
+        List[Comparison]: Per benchmark change, in the order of the current run.
+    """
+    comparisons = []
+    for name, result in current.results.items():
+        if name not in baseline.results:
+            continue
+        reference = baseline.results[name].ops_per_sec
+        change = result.ops_per_sec / reference - 1
+        comparisons.append(
+            Comparison(
+                name=name,
+                baseline=reference,
+                current=result.ops_per_sec,
+                change=change,
+                regressed=change < -threshold,
+            )
+        )
+    return comparisons
@@ -0,0 +1,38 @@
+"""
+Response serialization benchmarks: dumping a model in JSON mode and rendering it
+with ORJSONResponse, as FastAPI does for endpoints with a response model.
+"""
+from typing import AsyncIterator
+from uuid import uuid4
+
+from fastapi.responses import ORJSONResponse
+from sqlmodel import SQLModel
+
+from benchmarks.runner import Operation, benchmark
+from src.models import Profile, TokenPayload, UserView
+from src.models.utils import utcnow
+
+
+def render(model: SQLModel) -> Operation:
+    return lambda: ORJSONResponse(model.model_dump(mode="json"))
+
+
+@benchmark("serialize.token_payload")
+async def serialize_token_payload() -> AsyncIterator[Operation]:
+    yield render(TokenPayload(token_type="access", user_id=uuid4()))
+
+
+@benchmark("serialize.user_view")
+async def serialize_user_view() -> AsyncIterator[Operation]:
+    yield render(UserView(id=uuid4(), email="user@example.com", is_active=True))
+
+
+@benchmark("serialize.profile")
+async def serialize_profile() -> AsyncIterator[Operation]:
+    profile = Profile(
+        user_id=uuid4(),
+        username="benchmark",
+        picture="media/ab/cd/abcd.svg",
+        updated_at=utcnow(),
+    )
+    yield render(profile)
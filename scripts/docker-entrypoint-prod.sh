@@ -7,6 +7,11 @@ python ~/check_service.py --service-name "${DB_HOST}" --ip "${DB_HOST}" --port "
 echo "Apply database migrations"
 alembic upgrade head
 
+if [ -n "${PROMETHEUS_MULTIPROC_DIR}" ]; then
+    echo "Reset prometheus multiprocess directory"
+    rm -rf "${PROMETHEUS_MULTIPROC_DIR}" && mkdir -p "${PROMETHEUS_MULTIPROC_DIR}"
+fi
+
 echo "Running app with uvicorn"
 uvicorn src.main:app --host 0.0.0.0 --port 8080
 
@@ -0,0 +1,92 @@
+"""
+Pool of pre-rendered profile avatars.
+
+Rendering an avatar and writing it to the media store is done by a background
+filler, so creating a profile only has to claim an already stored file.
+"""
+import asyncio
+import os
+from collections import deque
+from typing import Deque, Optional
+
+from src.media import MediaStore, avatar_store
+from src.settings import settings
+from src.utils import render_avatar
+
+
+class AvatarPool:
+    """
+    Keep between low_watermark and high_watermark avatars rendered into the media
+    store, ready to be claimed.
+
+    Avatars that are never claimed, e.g. when the process stops, are not referenced
+    by any profile and are removed by the media store garbage collector.
+
+    Attributes:
+        store (MediaStore): Store avatars are written to.
+        low_watermark (int): Refill starts when fewer avatars are ready.
+        high_watermark (int): Refill stops when this many avatars are ready.
+    """
+
+    def __init__(
+        self, store: MediaStore, low_watermark: int, high_watermark: int
+    ) -> None:
+        self.store = store
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self._ready: Deque[str] = deque()
+        self._refill: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._ready)
+
+    def _render(self) -> str:
+        """
+        Render a new avatar into the store.
+
+        Returns:
+            str: The path of the avatar.
+        """
+        return self.store.put_sync(render_avatar())
+
+    def claim(self) -> str:
+        """
+        Take a pre-rendered avatar, rendering one synchronously if the pool is empty.
+
+        Returns:
+            str: The path of the avatar.
+        """
+        while self._ready:
+            path = self._ready.popleft()
+            if len(self._ready) < self.low_watermark and self._refill is not None:
+                self._refill.set()
+            if os.path.exists(path):
+                return path
+
+        return self._render()
+
+    async def fill(self) -> None:
+        """
+        Render avatars in a thread until the high watermark is reached.
+        """
+        while len(self._ready) < self.high_watermark:
+            path = await asyncio.to_thread(self._render)
+            self._ready.append(path)
+
+    async def run(self) -> None:
+        """
+        Keep the pool filled. Meant to run as a background task for the lifetime
+        of the application.
+        """
+        self._refill = asyncio.Event()
+        while True:
+            await self.fill()
+            self._refill.clear()
+            await self._refill.wait()
+
+
+avatar_pool = AvatarPool(
+    avatar_store,
+    low_watermark=settings.AVATAR_POOL_LOW_WATERMARK,
+    high_watermark=settings.AVATAR_POOL_HIGH_WATERMARK,
+)
@@ -0,0 +1,82 @@
+"""
+In-process caches used on hot request paths.
+"""
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Size bounded LRU cache whose entries expire after a time to live.
+
+    The cache is local to the process and is not thread safe, it is meant to be used
+    from the event loop only. With several workers every worker keeps its own copy,
+    so the TTL is the upper bound for how long a stale entry can be served.
+
+    Attributes:
+        maxsize (int): Maximum number of entries, least recently used are evicted first.
+        ttl (timedelta): Default time to live of an entry.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that found no valid entry.
+    """
+
+    def __init__(self, maxsize: int, ttl: timedelta) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, Tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Return the cached value for the key or None if it is missing or expired.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[timedelta] = None) -> None:
+        """
+        Store a value. The optional ttl overrides the default time to live and is
+        capped by it.
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= timedelta(0):
+            return
+        self._data[key] = (time.monotonic() + ttl.total_seconds(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: K) -> None:
+        """
+        Remove the key from the cache if present.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove all entries and reset the counters.
+        """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
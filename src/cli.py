@@ -0,0 +1,108 @@
+"""
+Command line maintenance tasks.
+
+Run with: python -m src.cli <command> [options]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import timedelta
+
+from src.importer import UserImporter, read_records
+from src.media import avatar_store
+from src.models import Profile
+from src.profiler import sign_profile_request
+from src.settings import async_session, settings
+
+
+async def collect_media(grace: timedelta) -> None:
+    """
+    Remove avatar files no profile references anymore.
+    """
+    async with async_session() as session:
+        removed = await avatar_store.collect_garbage(session, Profile.picture, grace)
+    print(f"Removed {removed} unreferenced files from {avatar_store.root}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maize API maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    collect_media_parser = subparsers.add_parser(
+        "collect-media", help="Remove unreferenced avatar files"
+    )
+    collect_media_parser.add_argument(
+        "--grace-seconds",
+        type=int,
+        default=int(settings.MEDIA_GC_GRACE.total_seconds()),
+        help="Keep unreferenced files younger than this",
+    )
+
+    import_users_parser = subparsers.add_parser(
+        "import-users", help="Import users from a CSV or NDJSON file"
+    )
+    import_users_parser.add_argument(
+        "file", help="CSV with a header row or NDJSON file, one user per row"
+    )
+    import_users_parser.add_argument(
+        "--format",
+        choices=("csv", "ndjson"),
+        help="File format, taken from the file extension by default",
+    )
+    import_users_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=settings.BULK_CHUNK_SIZE,
+        help="Users loaded per COPY",
+    )
+    import_users_parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Processes hashing passwords",
+    )
+    import_users_parser.add_argument(
+        "--with-profiles",
+        action="store_true",
+        help="Create profiles for imported active users",
+    )
+    import_users_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Validate and hash passwords without writing anything",
+    )
+
+    profile_token_parser = subparsers.add_parser(
+        "profile-token", help="Print an X-Profile header value to profile requests"
+    )
+    profile_token_parser.add_argument(
+        "--ttl-seconds",
+        type=int,
+        default=300,
+        help="Seconds the value stays valid",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "collect-media":
+        asyncio.run(collect_media(timedelta(seconds=args.grace_seconds)))
+    elif args.command == "import-users":
+        importer = UserImporter(
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            with_profiles=args.with_profiles,
+            dry_run=args.dry_run,
+        )
+        report = asyncio.run(importer.run(read_records(args.file, args.format)))
+        print(f"{'Dry run: ' if args.dry_run else ''}{report}")
+    elif args.command == "profile-token":
+        if not settings.PROFILER_SECRET:
+            sys.exit("PROFILER_SECRET is not set")
+        expires = int(time.time()) + args.ttl_seconds
+        print(sign_profile_request(settings.PROFILER_SECRET, expires))
+
+
+if __name__ == "__main__":
+    main()
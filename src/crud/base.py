@@ -1,65 +1,443 @@
-from typing import Generic, Sequence, Type, TypeVar
+import base64
+import binascii
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 from uuid import UUID
 
+import orjson
 from fastapi import HTTPException
-from sqlmodel import SQLModel, select
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import any_, bindparam, column, delete, insert, update, values
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import SQLModel, col, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.models.utils import BulkError, BulkResult, Page
+from src.settings import settings
+
 T = TypeVar("T", bound=SQLModel)
 
 
 class BaseCRUD(Generic[T]):
+    # Unique, indexed field used to order and paginate objects.
+    order_field: str = "id"
+    # Unique field objects are looked up, updated and deleted by.
+    lookup_field: str = "id"
+    not_found_detail: str = "Object not found"
+
     def __init__(self, model: Type[T]):
         """
         Initialize the CRUD object with the SQLModel model.
         """
         self.model = model
 
-    async def create(self, data: T, session: AsyncSession) -> T:
+    @property
+    def lookup_column(self) -> Any:
+        return col(getattr(self.model, self.lookup_field))
+
+    def _to_model(self, data: Any) -> T:
         """
-        Create a new object in the database.
+        Validate data as a model instance. Instances of the model are used as is,
+        table models are not validated on init and may hold values, such as password
+        hashes, that only their input schema would reject.
         """
-        obj = self.model.model_validate(data)
-        session.add(obj)
-        await session.commit()
-        await session.refresh(obj)
-        return obj
+        if isinstance(data, self.model):
+            return data
+        return self.model.model_validate(data)
+
+    async def create(self, data: T, session: AsyncSession, commit: bool = True) -> T:
+        """
+        Create a new object in the database with a single INSERT ... RETURNING.
+        """
+        obj = self._to_model(data)
+        statement = insert(self.model).values(**obj.model_dump()).returning(self.model)
+        result = await session.exec(statement)
+        db_obj = result.scalar_one()
+        if commit:
+            await session.commit()
+        return db_obj
+
+    async def create_if_absent(
+        self,
+        data: T,
+        session: AsyncSession,
+        conflict_fields: Sequence[str],
+        commit: bool = True,
+    ) -> Optional[T]:
+        """
+        Create a new object unless one with the same values of the unique
+        conflict_fields exists, with a single INSERT ... ON CONFLICT DO NOTHING
+        RETURNING. Unlike selecting first, this cannot race a concurrent insert.
+
+        Args:
+            data (T): The object to create.
+            session (AsyncSession): The database session.
+            conflict_fields (Sequence[str]): Fields of a unique constraint or index.
+            commit (bool): Whether to commit the transaction.
+
+        Returns:
+            T | None: The created object, None if it already existed.
+        """
+        obj = self._to_model(data)
+        statement = (
+            pg_insert(self.model)
+            .values(**obj.model_dump())
+            .on_conflict_do_nothing(index_elements=list(conflict_fields))
+            .returning(self.model)
+        )
+        result = await session.exec(statement)
+        db_obj = result.scalar_one_or_none()
+        if commit and db_obj is not None:
+            await session.commit()
+        return db_obj
 
     async def get_object(self, pk: UUID, session: AsyncSession) -> T:
         """
-        Retrieve an object by its primary key.
+        Retrieve an object by its lookup field (primary key by default).
         """
-        obj = await session.get(self.model, pk)
+        result = await session.exec(select(self.model).where(self.lookup_column == pk))
+        obj = result.first()
         if obj is None:
-            raise HTTPException(status_code=404, detail="Object not found")
+            raise HTTPException(status_code=404, detail=self.not_found_detail)
         return obj
 
-    async def update(self, pk: UUID, data: T, session: AsyncSession) -> T:
+    async def update(
+        self,
+        pk: UUID,
+        data: Union[T, Dict[str, Any]],
+        session: AsyncSession,
+        commit: bool = True,
+    ) -> T:
         """
-        Update an existing object in the database.
+        Update an existing object in the database with a single UPDATE ... RETURNING.
+        Only fields set on data are updated.
         """
-        db_obj = await self.get_object(pk, session)
-        dump_data = data.model_dump(exclude_unset=True)
-        db_obj.sqlmodel_update(dump_data)
-        session.add(db_obj)
-        await session.commit()
-        await session.refresh(db_obj)
+        dump_data = (
+            data if isinstance(data, dict) else data.model_dump(exclude_unset=True)
+        )
+        if not dump_data:
+            return await self.get_object(pk, session)
+
+        statement = (
+            update(self.model)
+            .where(self.lookup_column == pk)
+            .values(**dump_data)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        result = await session.exec(statement)
+        db_obj = result.scalar_one_or_none()
+        if db_obj is None:
+            raise HTTPException(status_code=404, detail=self.not_found_detail)
+        if commit:
+            await session.commit()
         return db_obj
 
-    async def delete(self, pk: UUID, session: AsyncSession) -> bool:
+    async def delete(self, pk: UUID, session: AsyncSession, commit: bool = True) -> bool:
         """
-        Delete an object from the database.
+        Delete an object from the database with a single DELETE ... RETURNING.
+        Cascades configured only on ORM relationships are not applied, dependent
+        rows are removed by ON DELETE CASCADE foreign keys (e.g. Profile.user_id).
         """
-        db_obj = await self.get_object(pk, session)
-        await session.delete(db_obj)
-        await session.commit()
+        statement = (
+            delete(self.model)
+            .where(self.lookup_column == pk)
+            .returning(self.lookup_column)
+        )
+        result = await session.exec(statement)
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail=self.not_found_detail)
+        if commit:
+            await session.commit()
         return True
 
+    async def _bulk_write(
+        self,
+        session: AsyncSession,
+        rows: List[Tuple[int, Dict[str, Any]]],
+        write: Callable[[List[Dict[str, Any]]], Awaitable[Sequence[Any]]],
+        result: BulkResult,
+        chunk_size: Optional[int],
+        commit: bool,
+    ) -> BulkResult:
+        """
+        Write validated rows in chunks, each chunk with one call of write inside a
+        savepoint. When a chunk fails, its rows are written one by one to find the
+        failing ones, the rest of the chunk is still written. Statements are Core
+        statements, objects already loaded into the session are not refreshed.
+
+        Args:
+            session (AsyncSession): The database session.
+            rows (List[Tuple[int, Dict[str, Any]]]): Input index and values of rows.
+            write: Writes rows and returns the lookup field values of written rows.
+            result (BulkResult): Result holding the validation errors.
+            chunk_size (int | None): Rows per chunk, defaults to BULK_CHUNK_SIZE.
+            commit (bool): Whether to commit the transaction once all chunks ran.
+
+        Returns:
+            BulkResult: The number of written rows and the errors of the others.
+        """
+        chunk_size = chunk_size or settings.BULK_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            try:
+                async with session.begin_nested():
+                    written = set(await write([row for _, row in chunk]))
+                attempts = [(chunk, written)]
+            except DBAPIError:
+                attempts = []
+                for index, row in chunk:
+                    try:
+                        async with session.begin_nested():
+                            attempts.append(([(index, row)], set(await write([row]))))
+                    except DBAPIError as e:
+                        result.errors.append(BulkError(index=index, detail=str(e.orig)))
+
+            for attempt, written in attempts:
+                for index, row in attempt:
+                    if row[self.lookup_field] in written:
+                        result.succeeded += 1
+                    else:
+                        detail = self.not_found_detail
+                        result.errors.append(BulkError(index=index, detail=detail))
+
+        if commit:
+            await session.commit()
+        result.errors.sort(key=lambda error: error.index)
+        return result
+
+    async def create_many(
+        self,
+        data: Sequence[Union[T, Dict[str, Any]]],
+        session: AsyncSession,
+        chunk_size: Optional[int] = None,
+        commit: bool = True,
+    ) -> BulkResult:
+        """
+        Create objects with one multi-row INSERT per chunk. Rows that fail
+        validation or violate a constraint are reported, all others are created.
+
+        Args:
+            data (Sequence[T | Dict[str, Any]]): Objects to create.
+            session (AsyncSession): The database session.
+            chunk_size (int | None): Rows per statement, defaults to BULK_CHUNK_SIZE.
+            commit (bool): Whether to commit the transaction.
+
+        Returns:
+            BulkResult: The number of created objects and the errors of the others.
+        """
+        result = BulkResult()
+        rows = []
+        for index, item in enumerate(data):
+            try:
+                rows.append((index, self._to_model(item).model_dump()))
+            except ValidationError as e:
+                result.errors.append(BulkError(index=index, detail=str(e)))
+
+        async def write(chunk: List[Dict[str, Any]]) -> Sequence[Any]:
+            table = self.model.__table__
+            statement = insert(table).values(chunk).returning(table.c[self.lookup_field])
+            return (await session.exec(statement)).scalars().all()
+
+        return await self._bulk_write(session, rows, write, result, chunk_size, commit)
+
+    async def update_many(
+        self,
+        data: Sequence[Union[T, Dict[str, Any]]],
+        session: AsyncSession,
+        chunk_size: Optional[int] = None,
+        commit: bool = True,
+    ) -> BulkResult:
+        """
+        Update objects with one UPDATE ... FROM (VALUES ...) per chunk and set of
+        updated fields. Every item holds the lookup field of the object it updates
+        and the fields to update, as in update.
+
+        Args:
+            data (Sequence[T | Dict[str, Any]]): Lookup field and changed fields.
+            session (AsyncSession): The database session.
+            chunk_size (int | None): Rows per statement, defaults to BULK_CHUNK_SIZE.
+            commit (bool): Whether to commit the transaction.
+
+        Returns:
+            BulkResult: The number of updated objects and the errors of the others,
+                including objects that do not exist.
+        """
+        result = BulkResult()
+        rows = []
+        for index, item in enumerate(data):
+            dump_data = (
+                item if isinstance(item, dict) else item.model_dump(exclude_unset=True)
+            )
+            if self.lookup_field not in dump_data or len(dump_data) < 2:
+                detail = f"{self.lookup_field} and at least one field are required"
+                result.errors.append(BulkError(index=index, detail=detail))
+                continue
+            try:
+                row = {
+                    name: self._parse_field(name, value)
+                    for name, value in dump_data.items()
+                }
+            except HTTPException as e:
+                result.errors.append(BulkError(index=index, detail=e.detail))
+                continue
+            rows.append((index, row))
+
+        table = self.model.__table__
+        key = self.lookup_field
+
+        async def write(chunk: List[Dict[str, Any]]) -> Sequence[Any]:
+            groups: Dict[Tuple[str, ...], List[Tuple[Any, ...]]] = {}
+            for row in chunk:
+                fields = tuple(sorted(row))
+                groups.setdefault(fields, []).append(tuple(row[name] for name in fields))
+
+            written = []
+            for fields, group in groups.items():
+                source = values(
+                    *(column(name, table.c[name].type) for name in fields),
+                    name="source",
+                ).data(group)
+                statement = (
+                    update(table)
+                    .where(table.c[key] == source.c[key])
+                    .values({name: source.c[name] for name in fields if name != key})
+                    .returning(table.c[key])
+                )
+                written.extend((await session.exec(statement)).scalars().all())
+            return written
+
+        return await self._bulk_write(session, rows, write, result, chunk_size, commit)
+
+    async def delete_many(
+        self,
+        pks: Sequence[Any],
+        session: AsyncSession,
+        chunk_size: Optional[int] = None,
+        commit: bool = True,
+    ) -> BulkResult:
+        """
+        Delete objects by their lookup field with one DELETE ... WHERE = ANY per
+        chunk. As in delete, dependent rows are removed by the database, ORM-only
+        cascades are not applied.
+
+        Args:
+            pks (Sequence[Any]): Lookup field values of the objects to delete.
+            session (AsyncSession): The database session.
+            chunk_size (int | None): Rows per statement, defaults to BULK_CHUNK_SIZE.
+            commit (bool): Whether to commit the transaction.
+
+        Returns:
+            BulkResult: The number of deleted objects and the errors of the others,
+                including objects that do not exist.
+        """
+        result = BulkResult()
+        rows = []
+        for index, pk in enumerate(pks):
+            try:
+                rows.append(
+                    (index, {self.lookup_field: self._parse_field(self.lookup_field, pk)})
+                )
+            except HTTPException as e:
+                result.errors.append(BulkError(index=index, detail=e.detail))
+
+        async def write(chunk: List[Dict[str, Any]]) -> Sequence[Any]:
+            keys = [row[self.lookup_field] for row in chunk]
+            key = self.model.__table__.c[self.lookup_field]
+            ids = bindparam("ids", keys, type_=ARRAY(key.type))
+            statement = delete(key.table).where(key == any_(ids)).returning(key)
+            return (await session.exec(statement)).scalars().all()
+
+        return await self._bulk_write(session, rows, write, result, chunk_size, commit)
+
     async def list(
         self, session: AsyncSession, skip: int = 0, limit: int = 100
     ) -> Sequence[T]:
         """
         List objects from the database with optional pagination.
+        Prefer paginate for large tables, offsets are scanned on every call.
         """
-        result = await session.exec(select(self.model).offset(skip).limit(limit))
+        order_by = col(getattr(self.model, self.order_field))
+        statement = select(self.model).order_by(order_by).offset(skip).limit(limit)
+        result = await session.exec(statement)
         return result.all()
+
+    def _parse_field(self, name: str, value: Any) -> Any:
+        """
+        Validate a raw value (e.g. from a query string) as the model field type.
+        """
+        field = self.model.model_fields.get(name)
+        if field is None:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+        try:
+            return TypeAdapter(field.annotation).validate_python(value)
+        except ValidationError:
+            raise HTTPException(status_code=400, detail=f"Invalid value for {name}")
+
+    @staticmethod
+    def encode_cursor(value: Any) -> str:
+        """
+        Encode the order field value of the last object of a page as opaque cursor.
+        """
+        return base64.urlsafe_b64encode(orjson.dumps(value)).decode()
+
+    def decode_cursor(self, cursor: str) -> Any:
+        """
+        Decode a cursor created by encode_cursor.
+        """
+        try:
+            value = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return self._parse_field(self.order_field, value)
+
+    async def paginate(
+        self,
+        session: AsyncSession,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Page[T]:
+        """
+        List objects ordered by order_field, continuing after the cursor.
+        Uses keyset pagination, so every page costs the same no matter how deep it is.
+
+        Args:
+            session (AsyncSession): The database session.
+            cursor (str | None): next_cursor of the previous page.
+            limit (int): Maximum number of objects on the page.
+            filters (Dict[str, Any] | None): Field values objects have to be equal to.
+
+        Returns:
+            Page[T]: The objects and the cursor of the next page.
+        """
+        order_by = col(getattr(self.model, self.order_field))
+        statement = select(self.model).order_by(order_by).limit(limit + 1)
+        if cursor is not None:
+            statement = statement.where(order_by > self.decode_cursor(cursor))
+        for name, value in (filters or {}).items():
+            value = self._parse_field(name, value)
+            statement = statement.where(col(getattr(self.model, name)) == value)
+
+        result = await session.exec(statement)
+        items = result.all()
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self.encode_cursor(getattr(items[-1], self.order_field))
+        return Page(items=items, next_cursor=next_cursor)
@@ -1,6 +1,10 @@
+from datetime import datetime
+from typing import Sequence
 from uuid import UUID
 
 from fastapi import HTTPException
+from sqlalchemy import any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -9,16 +13,32 @@ from src.models import Profile
 
 
 class ProfileCrud(BaseCRUD):
-    async def get_object(self, pk: UUID, session: AsyncSession) -> Profile:
+    # Profiles are looked up by their users primary key.
+    lookup_field = "user_id"
+
+    async def get_version(self, pk: UUID, session: AsyncSession) -> datetime:
+        """
+        Retrieve only the version (updated_at) of a profile by its users primary key.
+        """
+        statement = select(self.model.updated_at).where(self.lookup_column == pk)
+        result = await session.exec(statement)
+        updated_at = result.first()
+        if updated_at is None:
+            raise HTTPException(status_code=404, detail=self.not_found_detail)
+        return updated_at
+
+    async def get_many(
+        self, pks: Sequence[UUID], session: AsyncSession
+    ) -> Sequence[Profile]:
         """
-        Retrieve a profile by its users primary key. Overridden base get object.
+        Retrieve profiles by their users primary keys with a single query.
+        The keys are sent as one array parameter, so the statement is the same
+        for any number of keys.
         """
-        statement = select(self.model).where(self.model.user_id == pk)
+        ids = bindparam("ids", list(pks), type_=ARRAY(self.lookup_column.type))
+        statement = select(self.model).where(self.lookup_column == any_(ids))
         result = await session.exec(statement)
-        profile = result.first()
-        if profile is None:
-            raise HTTPException(status_code=404, detail="Object not found")
-        return profile  # noqa
+        return result.all()
 
 
 profile_manager = ProfileCrud(Profile)
@@ -0,0 +1,9 @@
+from src.crud.base import BaseCRUD
+from src.models import User
+
+
+class UserCrud(BaseCRUD):
+    not_found_detail = "User not found"
+
+
+user_manager = UserCrud(User)
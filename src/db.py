@@ -0,0 +1,296 @@
+"""
+Routing of read-only database sessions to read replicas and tracking of the
+database usage of requests.
+
+Sessions of read-only routes are bound to the replicas in DB_REPLICA_URLS in
+round-robin order. Replicas are checked periodically and skipped while a check
+fails. Without healthy replicas, or without replicas at all, the primary is used.
+Replicas lag behind the primary, so flows that have to read their own writes keep
+using the primary session of get_db.
+
+Sessions check out a connection on their first query and return it when their
+transaction ends. DatabaseStats collects how long connections were checked out and
+which statements ran while serving a request, see src.middleware.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import (
+    Any,
+    Counter,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.metrics import (
+    DB_CONNECTION_HOLD_DURATION,
+    DB_CONNECTIONS_CHECKED_OUT,
+    DB_POOL_SIZE,
+)
+from src.settings import async_session, engine, settings
+
+
+class DatabaseStats:
+    """
+    Database usage of one request (or of a test, see tests.utils.assert_max_queries).
+    Usage is also added to the parent stats, so nested stats see the same queries.
+
+    Attributes:
+        checkouts (int): Number of pooled connection checkouts.
+        hold_time (float): Seconds returned connections were checked out in total.
+        open_checkouts (Dict[int, float]): Checkout start times of connections not
+            returned yet, by connection record id.
+        queries (int): Number of executed statements.
+        query_time (float): Seconds spent executing statements.
+        statements (Counter[str]): Executions by statement text.
+        parent (DatabaseStats | None): Enclosing stats.
+    """
+
+    def __init__(self, parent: Optional["DatabaseStats"] = None) -> None:
+        self.checkouts = 0
+        self.hold_time = 0.0
+        self.open_checkouts: Dict[int, float] = {}
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements: Counter[str] = Counter()
+        self.parent = parent
+
+    def _chain(self) -> Iterator["DatabaseStats"]:
+        stats: Optional[DatabaseStats] = self
+        while stats is not None:
+            yield stats
+            stats = stats.parent
+
+    def add_checkout(self, key: int, start: float) -> None:
+        for stats in self._chain():
+            stats.checkouts += 1
+            stats.open_checkouts[key] = start
+
+    def add_checkin(self, key: int, hold_time: float) -> None:
+        for stats in self._chain():
+            stats.open_checkouts.pop(key, None)
+            stats.hold_time += hold_time
+
+    def current_hold_time(self) -> float:
+        """
+        Seconds connections were checked out so far, including connections that
+        are still checked out, e.g. by a session closed only after the response.
+        """
+        now = time.perf_counter()
+        return self.hold_time + sum(now - start for start in self.open_checkouts.values())
+
+    def add_query(self, statement: str, seconds: float) -> None:
+        for stats in self._chain():
+            stats.queries += 1
+            stats.query_time += seconds
+            stats.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Statements executed at least threshold times, typically an N+1 pattern:
+        one query per object of an earlier result.
+        """
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+database_stats: ContextVar[Optional[DatabaseStats]] = ContextVar(
+    "database_stats", default=None
+)
+
+
+def track_database_usage(engine: AsyncEngine, pool: str = "primary") -> None:
+    """
+    Record pool checkouts and executed statements of the engine in the
+    DatabaseStats of the current context and in the pool metrics. Checkouts are
+    bound to the stats at checkout, so a connection returned outside of the request
+    context is still accounted to the request.
+
+    Args:
+        engine (AsyncEngine): The tracked engine.
+        pool (str): Name of the engine pool in metrics.
+    """
+    DB_POOL_SIZE.labels(pool).set(engine.pool.size())
+    checked_out_gauge = DB_CONNECTIONS_CHECKED_OUT.labels(pool)
+    hold_duration = DB_CONNECTION_HOLD_DURATION.labels(pool)
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        stats = database_stats.get()
+        start = time.perf_counter()
+        if stats is not None:
+            stats.add_checkout(id(connection_record), start)
+        connection_record.info["checked_out"] = (stats, start)
+        checked_out_gauge.inc()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record) -> None:
+        checked_out = connection_record.info.pop("checked_out", None)
+        if checked_out is None:
+            return
+        stats, start = checked_out
+        hold_time = time.perf_counter() - start
+        if stats is not None:
+            stats.add_checkin(id(connection_record), hold_time)
+        checked_out_gauge.dec()
+        hold_duration.observe(hold_time)
+
+    # A connection runs one statement at a time, so a single start time suffices.
+    # It is replaced by the next statement even if a failed one left it behind.
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, *args) -> None:
+        conn.info["query_start"] = time.perf_counter()
+
+    def end_query(conn, statement: str) -> None:
+        start = conn.info.pop("query_start", None)
+        stats = database_stats.get()
+        if start is not None and stats is not None:
+            stats.add_query(statement, time.perf_counter() - start)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, *args) -> None:
+        end_query(conn, statement)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(context) -> None:
+        if context.connection is not None and context.statement is not None:
+            end_query(context.connection, context.statement)
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    End the transaction of a session, so its connection returns to the pool before
+    slow work such as password hashing. Loaded objects stay usable, the next query
+    checks out a connection again.
+    """
+    await session.commit()
+
+
+class Replica:
+    """
+    A read replica, its engine and health.
+
+    Attributes:
+        engine (AsyncEngine): Engine of read-only connections to the replica.
+        session (sessionmaker): Session factory bound to the engine.
+        healthy (bool): Outcome of the last health check.
+    """
+
+    def __init__(self, url: str, engine_options: Dict[str, Any]) -> None:
+        self.engine: AsyncEngine = create_async_engine(
+            url, **engine_options
+        ).execution_options(postgresql_readonly=True)
+        self.session = sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self.healthy = True
+        track_database_usage(self.engine, pool=f"replica:{self.engine.url.host}")
+
+    async def check(self, timeout: float) -> bool:
+        """
+        Check that the replica answers a query within timeout seconds.
+        """
+        try:
+            async with self.engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+        except Exception as e:
+            if self.healthy:
+                logging.warning(f"Replica {self.engine.url!r} is unhealthy: {e!r}")
+            self.healthy = False
+        else:
+            if not self.healthy:
+                logging.warning(f"Replica {self.engine.url!r} is healthy again")
+            self.healthy = True
+        return self.healthy
+
+
+class ReplicaSet:
+    """
+    Hand out sessions bound to healthy replicas in round-robin order.
+
+    Attributes:
+        replicas (List[Replica]): The configured replicas.
+        primary (sessionmaker): Session factory used when no replica is healthy.
+        check_interval (timedelta): Time between health checks.
+        check_timeout (float): Seconds a replica has to answer a health check.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        engine_options: Dict[str, Any],
+        primary: sessionmaker,
+        check_interval: timedelta,
+        check_timeout: float,
+    ) -> None:
+        self.replicas: List[Replica] = [Replica(url, engine_options) for url in urls]
+        self.primary = primary
+        self.check_interval = check_interval
+        self.check_timeout = check_timeout
+        self._next = itertools.count()
+
+    @property
+    def healthy(self) -> List[Replica]:
+        """
+        The replicas that passed their last health check.
+        """
+        return [replica for replica in self.replicas if replica.healthy]
+
+    def session(self) -> AsyncSession:
+        """
+        Create a session bound to the next healthy replica, or to the primary.
+        """
+        healthy = self.healthy
+        if not healthy:
+            return self.primary()
+        return healthy[next(self._next) % len(healthy)].session()
+
+    async def check(self) -> None:
+        """
+        Check all replicas concurrently.
+        """
+        await asyncio.gather(
+            *(replica.check(self.check_timeout) for replica in self.replicas)
+        )
+
+    async def run(self) -> None:
+        """
+        Keep checking replica health. Meant to run as a background task for the
+        lifetime of the application.
+        """
+        while self.replicas:
+            await self.check()
+            await asyncio.sleep(self.check_interval.total_seconds())
+
+    async def dispose(self) -> None:
+        """
+        Close the connections of all replica engines.
+        """
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+track_database_usage(engine)
+
+replicas = ReplicaSet(
+    settings.DB_REPLICA_URLS,
+    settings.engine_options,
+    primary=async_session,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL,
+    check_timeout=settings.DB_REPLICA_CHECK_TIMEOUT,
+)
@@ -1,4 +1,7 @@
+import time
+from datetime import timedelta
 from typing import Annotated
+from uuid import UUID
 
 import jwt
 from fastapi import Depends, HTTPException, status
@@ -8,15 +11,26 @@ from pydantic import ValidationError
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.models import TokenPayload, User
+from src.cache import TTLCache
+from src.db import replicas
+from src.models import TokenPayload, User, UserSnapshot
+from src.models.user import RoleEnum
 from src.settings import async_session, settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+user_cache: TTLCache[UUID, UserSnapshot] = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL
+)
+token_cache: TTLCache[str, TokenPayload] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL
+)
+
 
 async def get_db() -> AsyncSession:
     """
-    Get a database session.
+    Get a database session. The session checks out a pooled connection on its first
+    query only, routes that do not query never take one.
 
     Yields:
         AsyncSession: An asynchronous SQLAlchemy session.
@@ -25,9 +39,34 @@ async def get_db() -> AsyncSession:
         yield session
 
 
-def verify_token(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenPayload:
+async def get_read_db(
+    primary: AsyncSession = Depends(get_db),
+) -> AsyncSession:
     """
-    Verify and decode a JWT token.
+    Get a database session for read-only routes, bound to a read replica when
+    replicas are configured and healthy. Otherwise the primary session of the
+    request is shared, so the route and e.g. the user lookup use one connection.
+    Writes and reads of data written in the same flow have to use get_db.
+
+    Args:
+        primary (AsyncSession): The primary session of the request.
+
+    Yields:
+        AsyncSession: An asynchronous SQLAlchemy session.
+    """
+    if not replicas.healthy:
+        yield primary
+        return
+    async with replicas.session() as session:
+        yield session
+
+
+async def verify_token(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenPayload:
+    """
+    Verify and decode a JWT token. Valid tokens are memoized until they expire,
+    so repeated requests with the same token skip signature verification.
+    Async, like the dependencies built on it, so FastAPI runs it on the event loop
+    rather than in the threadpool: the token cache is not thread safe.
 
     Args:
         token (str): JWT token obtained from the login (OAuth2 scheme).
@@ -38,6 +77,10 @@ def verify_token(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenPayload:
     Raises:
         HTTPException: If the token is invalid, cannot be decoded or expired.
     """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         token_data = TokenPayload(**payload)
@@ -46,10 +89,16 @@ def verify_token(token: Annotated[str, Depends(oauth2_scheme)]) -> TokenPayload:
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+
+    if "exp" in payload:
+        expires_in = timedelta(seconds=payload["exp"] - time.time())
+        token_cache.set(token, token_data, ttl=expires_in)
     return token_data
 
 
-def verify_access_token(token_data: TokenPayload = Depends(verify_token)) -> TokenPayload:
+async def verify_access_token(
+    token_data: TokenPayload = Depends(verify_token),
+) -> TokenPayload:
     """
     Verify that the token is an access token.
 
@@ -70,7 +119,7 @@ def verify_access_token(token_data: TokenPayload = Depends(verify_token)) -> Tok
     return token_data
 
 
-def verify_refresh_token(
+async def verify_refresh_token(
     token_data: TokenPayload = Depends(verify_token),
 ) -> TokenPayload:
     """
@@ -93,7 +142,7 @@ def verify_refresh_token(
     return token_data
 
 
-def verify_one_time_token(
+async def verify_one_time_token(
     token_data: TokenPayload = Depends(verify_token),
 ) -> TokenPayload:
     """
@@ -120,40 +169,51 @@ def verify_one_time_token(
 async def get_current_user(
     token_data: TokenPayload = Depends(verify_access_token),
     session: AsyncSession = Depends(get_db),
-) -> User:
+) -> UserSnapshot:
     """
-    Get the current user from the database.
+    Get the current user. Served from the user cache when possible,
+    otherwise loaded from the primary database and cached. Not read from a
+    replica: a lagging replica would return, and the cache keep, a stale user
+    right after e.g. the email verification activated it.
 
     Args:
         token_data (TokenPayload): The payload data of the token.
         session (AsyncSession): The database session.
 
     Returns:
-        User: The current user.
+        UserSnapshot: The current user.
 
     Raises:
         HTTPException: If the user is not found.
     """
-    statement = select(User).where(User.id == token_data.user_id)
+    snapshot = user_cache.get(token_data.user_id)
+    if snapshot is not None:
+        return snapshot
+
+    statement = select(User.id, User.role, User.is_active).where(
+        User.id == token_data.user_id
+    )
     result = await session.exec(statement)
     user = result.first()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    snapshot = UserSnapshot(id=user.id, role=user.role, is_active=user.is_active)
+    user_cache.set(snapshot.id, snapshot)
+    return snapshot
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: UserSnapshot = Depends(get_current_user),
+) -> UserSnapshot:
     """
     Get the current active user.
 
     Args:
-        current_user (User): The current user.
+        current_user (UserSnapshot): The current user.
 
     Returns:
-        User: The current active (verified) user.
+        UserSnapshot: The current active (verified) user.
 
     Raises:
         HTTPException: If the user is inactive.
@@ -161,3 +221,25 @@ async def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_current_admin_user(
+    current_user: UserSnapshot = Depends(get_current_active_user),
+) -> UserSnapshot:
+    """
+    Get the current active user if it is an admin.
+
+    Args:
+        current_user (UserSnapshot): The current active user.
+
+    Returns:
+        UserSnapshot: The current admin user.
+
+    Raises:
+        HTTPException: If the user is not an admin.
+    """
+    if current_user.role != RoleEnum.admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+    return current_user
@@ -0,0 +1,105 @@
+from enum import Enum
+from typing import AsyncIterator, Dict, List, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlmodel import col, select
+
+from src.db import replicas
+from src.deps import get_current_admin_user
+from src.models import Profile, ProfilerReport, User
+from src.profiler import profile_store
+from src.settings import settings
+
+router = APIRouter(
+    prefix="/admin", tags=["admin"], dependencies=[Depends(get_current_admin_user)]
+)
+
+
+class ExportModel(str, Enum):
+    user = "user"
+    profile = "profile"
+
+
+# Exported columns of every model, sensitive columns are left out.
+EXPORT_COLUMNS: Dict[ExportModel, Tuple] = {
+    ExportModel.user: (User.id, User.email, User.role, User.is_active),
+    ExportModel.profile: (
+        Profile.id,
+        Profile.user_id,
+        Profile.username,
+        Profile.picture,
+        Profile.updated_at,
+    ),
+}
+
+
+async def export_rows(model: ExportModel) -> AsyncIterator[bytes]:
+    """
+    Stream rows of a model as NDJSON, one chunk of lines per EXPORT_YIELD_PER rows.
+
+    The rows are read through a server-side cursor, so memory use does not depend
+    on the size of the table. The session is opened here, request dependencies are
+    closed before the response body is sent. Rows are read from a replica if
+    replicas are configured.
+
+    Yields:
+        bytes: NDJSON lines.
+    """
+    columns = EXPORT_COLUMNS[model]
+    statement = (
+        select(*columns)
+        .order_by(col(columns[0]))
+        .execution_options(yield_per=settings.EXPORT_YIELD_PER)
+    )
+    async with replicas.session() as session:
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            yield b"".join(orjson.dumps(row._asdict()) + b"\n" for row in rows)
+
+
+@router.get("/export/{model}", response_class=StreamingResponse)
+async def export(model: ExportModel) -> StreamingResponse:
+    """
+    Export all rows of a model as NDJSON (one JSON object per line).
+
+    Returns:
+        A streaming response with the rows ordered by primary key.
+    """
+    return StreamingResponse(
+        export_rows(model),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{model.value}.ndjson"'},
+    )
+
+
+@router.get("/profiles", response_model=List[ProfilerReport])
+async def list_profiles() -> List[ProfilerReport]:
+    """
+    List the stored request profiles, newest first. All workers store their reports
+    in PROFILER_DIR, so the list covers every worker, and PROFILER_MAX_REPORTS
+    limits the reports of the directory as a whole, not of each worker.
+
+    Returns:
+        List of the reports.
+    """
+    return profile_store.list()
+
+
+@router.get("/profiles/{name}", response_class=FileResponse)
+async def get_profile(name: str) -> FileResponse:
+    """
+    Download a request profile in the collapsed stack format, e.g. to render it
+    with flamegraph.pl or speedscope.
+
+    Raises:
+        HTTPException: If there is no report with the given name.
+
+    Returns:
+        The report as plain text.
+    """
+    path = profile_store.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
@@ -1,16 +1,20 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, status
+from fastapi import APIRouter, Depends, status
 from fastapi.exceptions import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import EmailStr
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.crud.user import user_manager
+from src.db import release_connection
 from src.deps import (
     get_current_active_user,
     get_db,
+    user_cache,
     verify_one_time_token,
     verify_refresh_token,
 )
+from src.hashing import password_hasher
 from src.JWT import JWTToken
 from src.models import (
     AccessTokenPayload,
@@ -22,10 +26,10 @@ from src.models import (
     TokenPayload,
     User,
     UserCreate,
+    UserSnapshot,
     UserView,
 )
-from src.settings import pwd_cxt
-from src.tasks import send_password_reset_email, send_verification_email
+from src.tasks import queue_password_reset_email, queue_verification_email
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -33,7 +37,6 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/register", response_model=UserView)
 async def register(
     user: UserCreate,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db),
 ):
     """
@@ -43,19 +46,20 @@ async def register(
     Returns:
         The details of the registered user.
     """
-
-    statement = select(User).where(User.email == user.email)
-    result = await session.exec(statement)
-    db_user = result.one_or_none()
-    if db_user:
+    # Hash before the first query, so no connection is held during bcrypt.
+    hashed_password = await password_hasher.hash(user.password)
+    db_user = await user_manager.create_if_absent(
+        User(email=user.email, password=hashed_password),
+        session,
+        conflict_fields=("email",),
+        commit=False,
+    )
+    if db_user is None:
         raise HTTPException(status_code=400, detail="email already exists")
 
-    db_user = User(email=user.email, password=pwd_cxt.hash(user.password))
-    session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
     token = JWTToken(db_user.id).get_one_time_token()
-    background_tasks.add_task(send_verification_email, db_user.email, token)
+    queue_verification_email(session, db_user.email, token)
+    await session.commit()
 
     return db_user
 
@@ -63,7 +67,6 @@ async def register(
 @router.get("/resend-verification-email", response_model=MessageResponse)
 async def resend_verification_email(
     email: EmailStr,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db),
 ):
     """
@@ -78,7 +81,8 @@ async def resend_verification_email(
     if db_user.is_active:
         raise HTTPException(status_code=400, detail="User is already active")
     token = JWTToken(db_user.id).get_one_time_token()
-    background_tasks.add_task(send_verification_email, email, token)
+    queue_verification_email(session, email, token)
+    await session.commit()
     return {"message": "Verification email sent successfully"}
 
 
@@ -101,7 +105,8 @@ async def login(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="User Doesn't Exist"
         )
-    if not pwd_cxt.verify(request.password, user.password):
+    await release_connection(session)
+    if not await password_hasher.verify(request.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Credentials"
         )
@@ -161,6 +166,7 @@ async def verify_email(
     session.add(profile)
 
     await session.commit()
+    user_cache.invalidate(user.id)
 
     return {"message": "User successfully activated"}
 
@@ -168,7 +174,7 @@ async def verify_email(
 @router.post("/change-password", response_model=MessageResponse)
 async def change_password(
     payload: PasswordChange,
-    user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
     session: AsyncSession = Depends(get_db),
 ):
     """
@@ -177,14 +183,22 @@ async def change_password(
     Returns:
         A message indicating the password change status.
     """
-    if not pwd_cxt.verify(payload.old_password, user.password):
+    statement = select(User.password).where(User.id == current_user.id)
+    result = await session.exec(statement)
+    password = result.one_or_none()
+
+    if not password:
+        raise HTTPException(status_code=404, detail="User not found")
+    await release_connection(session)
+
+    if not await password_hasher.verify(payload.old_password, password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect old password"
         )
 
-    user.password = pwd_cxt.hash(payload.new_password)
-    session.add(user)
-    await session.commit()
+    new_password = await password_hasher.hash(payload.new_password)
+    await user_manager.update(current_user.id, {"password": new_password}, session)
+    user_cache.invalidate(current_user.id)
 
     return {"message": "Password updated successfully"}
 
@@ -192,7 +206,6 @@ async def change_password(
 @router.get("/forgot-password", response_model=MessageResponse)
 async def forgot_password(
     email: EmailStr,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db),
 ):
     """
@@ -209,7 +222,8 @@ async def forgot_password(
         raise HTTPException(status_code=404, detail="User with this email does not exist")
 
     token = JWTToken(user.id).get_one_time_token()
-    background_tasks.add_task(send_password_reset_email, user.email, token)
+    queue_password_reset_email(session, user.email, token)
+    await session.commit()
 
     return {"message": "Password reset email sent successfully"}
 
@@ -226,15 +240,8 @@ async def reset_password(
     Returns:
         A message indicating the password reset status.
     """
-    statement = select(User).where(User.id == token.user_id)
-    result = await session.exec(statement)
-    user = result.one_or_none()
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    user.password = pwd_cxt.hash(password.new_password)
-    session.add(user)
-    await session.commit()
+    new_password = await password_hasher.hash(password.new_password)
+    await user_manager.update(token.user_id, {"password": new_password}, session)
+    user_cache.invalidate(token.user_id)
 
     return {"message": "Password reset successfully"}
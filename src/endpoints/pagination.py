@@ -0,0 +1,57 @@
+from typing import Optional, Sequence, Type
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.crud.base import BaseCRUD
+from src.deps import get_read_db
+from src.models.utils import Page
+from src.settings import settings
+
+
+def paginated_router(
+    crud: BaseCRUD,
+    response_model: Type[SQLModel],
+    filter_fields: Sequence[str] = (),
+    **router_kwargs,
+) -> APIRouter:
+    """
+    Create a router with a cursor paginated list endpoint for a CRUD object.
+
+    Args:
+        crud (BaseCRUD): CRUD object of the listed model.
+        response_model (Type[SQLModel]): Model used to serialize listed objects.
+        filter_fields (Sequence[str]): Model fields that can be filtered on
+            with query parameters, e.g. ?username=name.
+        router_kwargs: Arguments of the APIRouter, prefix is required.
+
+    Returns:
+        APIRouter: The router to include in the application.
+    """
+    router = APIRouter(**router_kwargs)
+
+    filters_description = ", ".join(filter_fields) or "none"
+
+    @router.get(
+        "",
+        response_model=Page[response_model],
+        description=(
+            "List objects page by page. Pass next_cursor of a page as cursor to get "
+            f"the next one. Filter query parameters: {filters_description}."
+        ),
+    )
+    async def list_objects(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(default=settings.PAGE_SIZE, ge=1, le=settings.PAGE_MAX_SIZE),
+        session: AsyncSession = Depends(get_read_db),
+    ):
+        filters = {
+            name: request.query_params[name]
+            for name in filter_fields
+            if name in request.query_params
+        }
+        return await crud.paginate(session, cursor=cursor, limit=limit, filters=filters)
+
+    return router
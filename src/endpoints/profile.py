@@ -1,21 +1,81 @@
+from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, Response, status
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.crud.profile import profile_manager
-from src.deps import get_current_active_user, get_db
-from src.models import Profile
+from src.deps import get_current_active_user, get_read_db
+from src.endpoints.pagination import paginated_router
+from src.models import Profile, ProfileBatchRequest, ProfileBatchResponse
 
 router = APIRouter(
     prefix="/profile", tags=["profile"], dependencies=(Depends(get_current_active_user),)
 )
 
+list_router = paginated_router(
+    profile_manager,
+    Profile,
+    filter_fields=("username",),
+    prefix="/profile",
+    tags=["profile"],
+    dependencies=(Depends(get_current_active_user),),
+)
+
+
+def profile_etag(updated_at: datetime) -> str:
+    """
+    Build the ETag of a profile from its version.
+    """
+    return f'"{int(updated_at.timestamp() * 1_000_000):x}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """
+    Check whether an If-None-Match header value matches the ETag.
+    """
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return any(tag in (etag, "*") for tag in tags)
+
+
+@router.post("/batch", response_model=ProfileBatchResponse)
+async def get_profiles(
+    payload: ProfileBatchRequest, session: AsyncSession = Depends(get_read_db)
+) -> dict:
+    """
+    Retrieve several profiles by user pks in one request.
+    Users without a profile are listed in missing instead of failing the request.
+    """
+    ids = list(dict.fromkeys(payload.ids))
+    profiles = {
+        profile.user_id: profile
+        for profile in await profile_manager.get_many(ids, session)
+    }
+    missing = [pk for pk in ids if pk not in profiles]
+    return {"profiles": profiles, "missing": missing}
+
 
 @router.get("/{user_pk}", response_model=Profile)
-async def get_profile(user_pk: UUID, session: AsyncSession = Depends(get_db)) -> Profile:
+async def get_profile(
+    user_pk: UUID,
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    session: AsyncSession = Depends(get_read_db),
+):
     """
-    Retrieve the profile with the user pk.
+    Retrieve the profile with the user pk. The response carries an ETag, when the
+    If-None-Match header matches it only the version is read and 304 is returned.
     """
+    if if_none_match:
+        etag = profile_etag(await profile_manager.get_version(user_pk, session))
+        if etag_matches(etag, if_none_match):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": "no-cache"},
+            )
+
     profile = await profile_manager.get_object(user_pk, session)
+    response.headers["ETag"] = profile_etag(profile.updated_at)
+    response.headers["Cache-Control"] = "no-cache"
     return profile
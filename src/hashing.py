@@ -0,0 +1,123 @@
+"""
+Asynchronous password hashing service.
+
+bcrypt is deliberately slow, so hashing and verification are executed in a bounded
+executor instead of the event loop. Requests that arrive while the executor backlog
+is full are rejected immediately with 503 instead of queueing behind it.
+"""
+import asyncio
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from src.metrics import PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED
+from src.settings import pwd_cxt, settings
+
+R = TypeVar("R")
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with the application crypt context.
+    Module level so it can be pickled into a process pool.
+    """
+    return pwd_cxt.hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash with the application crypt context.
+    Module level so it can be pickled into a process pool.
+    """
+    return pwd_cxt.verify(password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Run bcrypt hashing and verification in a bounded executor.
+
+    Attributes:
+        executor_type (str): "thread" or "process". bcrypt releases the GIL, so
+            threads are usually enough and avoid the process start-up cost.
+        max_workers (int): Number of executor workers.
+        max_pending (int): Maximum number of hashing jobs (running and queued)
+            before new ones are rejected with 503.
+    """
+
+    def __init__(self, executor_type: str, max_workers: int, max_pending: int) -> None:
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor type: {executor_type}")
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        """
+        Executor instance, created lazily on first use.
+        """
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hasher"
+                )
+        return self._executor
+
+    async def _run(self, func: Callable[..., R], *args) -> R:
+        """
+        Submit a job to the executor, rejecting it when the backlog is full.
+
+        Raises:
+            HTTPException: 503 if the number of pending jobs reached the limit.
+        """
+        if self.pending >= self.max_pending:
+            PASSWORD_HASH_REJECTED.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        PASSWORD_HASH_PENDING.inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_PENDING.dec()
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password without blocking the event loop.
+        """
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Verify a password without blocking the event loop.
+        """
+        return await self._run(verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        """
+        Shut down the executor. A new one is created if the hasher is used again.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor_type=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,130 @@
+"""
+Logging setup of the application.
+
+Log calls only put the record on a bounded in-memory queue; a QueueListener
+thread formats the records and writes them to a rotating file (or stderr), so the
+event loop never blocks on disk I/O. When the queue is full, e.g. during an error
+storm, records are dropped and counted instead of blocking the caller.
+
+File rotation is not safe across processes, so the log file is only written by a
+single worker. With several workers (PROMETHEUS_MULTIPROC_DIR set, see
+src.metrics) logs go to stderr, to be collected by the process manager.
+"""
+import atexit
+import copy
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+import orjson
+
+from src.metrics import LOG_RECORDS_DROPPED, MULTIPROCESS
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that drops records instead of blocking when the queue is full.
+
+    Attributes:
+        dropped (int): Number of records dropped so far.
+    """
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merge the message arguments, which may change after the call, but keep
+        exc_info so tracebacks are formatted in the listener thread rather than
+        on the caller's (event loop) thread.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
+class LogListener(QueueListener):
+    """
+    Queue listener that can be stopped more than once, e.g. explicitly and at exit.
+    """
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return orjson.dumps(data, default=str).decode()
+
+
+def setup_logging(
+    level: str,
+    filename: Optional[str],
+    json: bool,
+    max_bytes: int,
+    backup_count: int,
+    queue_size: int,
+) -> LogListener:
+    """
+    Route the records of the root logger through a bounded queue to a listener
+    thread writing them out. The listener is stopped, flushing the queue, on exit.
+
+    Args:
+        level (str): Level of the root logger.
+        filename (Optional[str]): Log file, rotated by size. Logs go to stderr if
+            None or if several workers run (PROMETHEUS_MULTIPROC_DIR is set).
+        json (bool): Write JSON lines instead of plain text.
+        max_bytes (int): Size at which the log file is rotated, 0 never rotates.
+        backup_count (int): Number of rotated files kept.
+        queue_size (int): Records buffered before new records are dropped.
+
+    Returns:
+        LogListener: The started listener.
+    """
+    handler: logging.Handler
+    if filename is None or MULTIPROCESS:
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = RotatingFileHandler(
+            filename, maxBytes=max_bytes, backupCount=backup_count
+        )
+    handler.setFormatter(JSONFormatter() if json else logging.Formatter(TEXT_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    root = logging.getLogger()
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+    root.addHandler(DroppingQueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = LogListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
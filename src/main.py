@@ -1,21 +1,70 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse
-from fastapi.staticfiles import StaticFiles
 
-from src.endpoints import auth, profile
+from src.avatars import avatar_pool
+from src.db import replicas
+from src.endpoints import admin, auth, profile
+from src.hashing import password_hasher
+from src.media import MediaFiles, avatar_store
+from src.metrics import mark_process_dead, metrics
+from src.middleware import (
+    LoadSheddingMiddleware,
+    MetricsMiddleware,
+    ServerTimingMiddleware,
+)
+from src.models import MessageResponse
+from src.monitor import loop_lag_monitor
+from src.profiler import ProfilerMiddleware, profile_store
+from src.settings import settings
+from src.smtp import smtp_pool
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    Start up and shut down application wide resources.
+    """
+    avatar_filler = asyncio.create_task(avatar_pool.run())
+    replica_checker = asyncio.create_task(replicas.run())
+    lag_monitor = asyncio.create_task(loop_lag_monitor.run())
+    yield
+    for task in (avatar_filler, replica_checker, lag_monitor):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await replicas.dispose()
+    mark_process_dead()
+    password_hasher.shutdown()
+    await smtp_pool.close()
+
 
 app = FastAPI(
     title="Maize API",
     description="MVP api for maize",
     version="0.01",
     default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 app.include_router(auth.router)
 app.include_router(profile.router)
+app.include_router(profile.list_router)
+app.include_router(admin.router)
+app.add_route("/metrics", metrics, include_in_schema=False)
+
+
+@app.get("/health", response_model=MessageResponse, tags=["health"])
+async def health():
+    """
+    Liveness check, also answered while the worker sheds load.
+    """
+    return {"message": "OK"}
+
 
 origins = [
     "http://localhost:3000",
@@ -25,6 +74,15 @@ origins = [
     "http://13.60.35.76",
 ]
 
+# Middleware added last runs first.
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(LoadSheddingMiddleware, monitor=loop_lag_monitor)
+app.add_middleware(MetricsMiddleware)
+if settings.profiler_enabled:
+    # Not installed at all unless enabled.
+    app.add_middleware(ProfilerMiddleware, store=profile_store)
+# Outermost, so shed 503s carry the CORS headers and preflights are answered
+# before load shedding.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -34,6 +92,9 @@ app.add_middleware(
 )
 
 # Check and create 'media' directory if it doesn't exist
-if not os.path.exists("media/profile"):
-    os.makedirs("media/profile")
-app.mount("/media/profile", StaticFiles(directory="media/profile"), name="media-profile")
+os.makedirs(avatar_store.root, exist_ok=True)
+app.mount(
+    f"/{avatar_store.root}",
+    MediaFiles(store=avatar_store),
+    name="media-profile",
+)
@@ -0,0 +1,273 @@
+"""
+Content addressed storage for media files.
+
+Files are stored under the sha256 hash of their content, sharded into two levels of
+subdirectories (ab/cd/abcd....svg), so identical files are stored once and no
+directory grows too large. A file is referenced by storing its path in the database,
+files nobody references anymore are removed by collect_garbage.
+
+Stored files never change, so they are served with immutable caching headers and
+their content hash as a strong ETag. Compressed variants are written next to every
+file when it is stored and picked by MediaFiles according to Accept-Encoding.
+"""
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import tempfile
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, Set, Tuple
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Content codings in order of preference: name -> (file extension, compressor).
+ENCODINGS: Dict[str, Tuple[str, Callable[[bytes], bytes]]] = {
+    "gzip": (".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)),
+}
+if brotli is not None:
+    ENCODINGS = {
+        "br": (".br", lambda data: brotli.compress(data, quality=11))
+    } | ENCODINGS
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class MediaStore:
+    """
+    Content addressed file store.
+
+    Attributes:
+        root (str): Directory files are stored in, also the URL path they are
+            served from.
+        suffix (str): File name suffix of stored files.
+    """
+
+    def __init__(self, root: str, suffix: str) -> None:
+        self.root = root
+        self.suffix = suffix
+
+    def path_for(self, digest: str) -> str:
+        """
+        Return the sharded path of a file with the given content hash.
+        """
+        return os.path.join(self.root, digest[:2], digest[2:4], digest + self.suffix)
+
+    def put_sync(self, data: bytes) -> str:
+        """
+        Store data unless a file with the same content already exists.
+        Blocking, prefer put from async code.
+
+        Returns:
+            str: The path of the stored file.
+        """
+        path = self.path_for(hashlib.sha256(data).hexdigest())
+        if os.path.exists(path):
+            # Refresh the modification time so the garbage collector grace period
+            # protects a file that is about to be referenced again.
+            os.utime(path)
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Compressed variants are written first, so they exist once the file does.
+        for extension, compress in ENCODINGS.values():
+            self._write(path + extension, compress(data))
+        self._write(path, data)
+        return path
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> None:
+        """
+        Write a file atomically, readers never see a partially written file.
+        """
+        # A unique temporary file, concurrent writes of the same file (from threads
+        # or processes) must not write into each other's.
+        with tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path),
+            prefix=os.path.basename(path) + ".",
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            f.write(data)
+        try:
+            # NamedTemporaryFile creates the file readable by the owner only.
+            os.chmod(f.name, 0o644)
+            os.replace(f.name, path)
+        except OSError:
+            os.remove(f.name)
+            raise
+
+    async def put(self, data: bytes) -> str:
+        """
+        Store data in a worker thread.
+
+        Returns:
+            str: The path of the stored file.
+        """
+        return await asyncio.to_thread(self.put_sync, data)
+
+    def iter_files(self) -> Iterator[str]:
+        """
+        Yield paths of all stored files.
+        """
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(self.suffix):
+                    yield os.path.join(dirpath, filename)
+
+    @staticmethod
+    async def reference_counts(session: AsyncSession, column: Any) -> Dict[str, int]:
+        """
+        Count database references of every referenced file.
+
+        Args:
+            session (AsyncSession): The database session.
+            column: Model column holding file paths, e.g. Profile.picture.
+
+        Returns:
+            Dict[str, int]: Number of references by file path.
+        """
+        statement = select(column, func.count()).group_by(column)
+        result = await session.exec(statement)
+        return dict(result.all())
+
+    def _remove_unreferenced(self, referenced: Set[str], grace: timedelta) -> int:
+        """
+        Remove files which are not referenced and older than the grace period.
+        """
+        removed = 0
+        deadline = time.time() - grace.total_seconds()
+        for path in self.iter_files():
+            if path in referenced:
+                continue
+            try:
+                if os.path.getmtime(path) >= deadline:
+                    continue
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                continue
+            for extension, _ in ENCODINGS.values():
+                try:
+                    os.remove(path + extension)
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    async def collect_garbage(
+        self, session: AsyncSession, column: Any, grace: timedelta
+    ) -> int:
+        """
+        Remove stored files that have no references left. Files younger than the
+        grace period are kept, they may be about to be referenced.
+
+        Args:
+            session (AsyncSession): The database session.
+            column: Model column holding file paths, e.g. Profile.picture.
+            grace (timedelta): Minimum age of a removed file.
+
+        Returns:
+            int: The number of removed files.
+        """
+        referenced = set(await self.reference_counts(session, column))
+        return await asyncio.to_thread(self._remove_unreferenced, referenced, grace)
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    """
+    Parse an Accept-Encoding header into the set of acceptable content codings.
+    """
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class MediaFiles(StaticFiles):
+    """
+    StaticFiles serving MediaStore files with immutable caching headers, the content
+    hash as ETag and precompressed variants chosen by Accept-Encoding.
+    """
+
+    def __init__(self, *, store: MediaStore, **kwargs) -> None:
+        super().__init__(directory=store.root, **kwargs)
+        self.store = store
+
+    @staticmethod
+    def _matches(if_none_match: str, digest: str) -> bool:
+        """
+        Check If-None-Match against the digest. Every variant of a file represents
+        the same content, so an ETag of any of them matches.
+        """
+        for tag in if_none_match.split(","):
+            tag = tag.strip().removeprefix("W/").strip('"')
+            if tag == "*" or tag.split("-")[0] == digest:
+                return True
+        return False
+
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        filename = os.path.basename(full_path)
+        if not filename.endswith(self.store.suffix):
+            return super().file_response(full_path, stat_result, scope, status_code)
+
+        request_headers = Headers(scope=scope)
+        digest = filename[: -len(self.store.suffix)]
+        headers = {
+            "cache-control": CACHE_CONTROL,
+            "vary": "Accept-Encoding",
+            "etag": f'"{digest}"',
+        }
+        if self._matches(request_headers.get("if-none-match", ""), digest):
+            return NotModifiedResponse(headers)
+
+        path, path_stat = full_path, stat_result
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, (extension, _) in ENCODINGS.items():
+            if encoding not in accepted:
+                continue
+            try:
+                path_stat = os.stat(full_path + extension)
+            except FileNotFoundError:
+                continue
+            path = full_path + extension
+            headers["content-encoding"] = encoding
+            headers["etag"] = f'"{digest}-{encoding}"'
+            break
+
+        return FileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            media_type=mimetypes.guess_type(filename)[0],
+            stat_result=path_stat,
+        )
+
+
+avatar_store = MediaStore("media/profile", suffix=".svg")
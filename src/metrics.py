@@ -0,0 +1,111 @@
+"""
+Prometheus metrics of the application, served at /metrics.
+
+With several uvicorn workers every worker keeps its own metrics. Set
+PROMETHEUS_MULTIPROC_DIR to an empty directory shared by the workers before they
+start, so the metrics are written there and aggregated over all workers on every
+scrape. Gauges are summed over the live workers.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Handled HTTP requests.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving an HTTP request until its response is sent.",
+    ("method", "route"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled.",
+    multiprocess_mode="livesum",
+)
+
+DB_CONNECTIONS_CHECKED_OUT = Gauge(
+    "db_connections_checked_out",
+    "Pooled database connections currently checked out.",
+    ("pool",),
+    multiprocess_mode="livesum",
+)
+DB_CONNECTION_HOLD_DURATION = Histogram(
+    "db_connection_hold_seconds",
+    "Time pooled database connections are checked out.",
+    ("pool",),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_size",
+    "Connections the database pool keeps open, overflow excluded.",
+    ("pool",),
+    multiprocess_mode="livesum",
+)
+
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Password hashing jobs running or queued in the executor.",
+    multiprocess_mode="livesum",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hashing jobs rejected because the executor backlog was full.",
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in running a scheduled callback, the worst worker.",
+    multiprocess_mode="livemax",
+)
+LOAD_SHED_REJECTED = Counter(
+    "load_shed_rejected_total",
+    "Requests rejected with 503 because the worker was overloaded.",
+    ("reason",),
+)
+
+EMAILS_SENT = Counter(
+    "emails_sent_total",
+    "Emails handed to the SMTP server, by outcome.",
+    ("outcome",),
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full.",
+)
+
+
+def metrics(request: Request) -> Response:
+    """
+    Expose the metrics in the Prometheus text format.
+    """
+    registry = REGISTRY
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead() -> None:
+    """
+    Remove the live gauge values of the current worker when it shuts down.
+    """
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
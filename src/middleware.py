@@ -0,0 +1,187 @@
+"""
+ASGI middleware of the application.
+
+The middleware are plain ASGI applications rather than BaseHTTPMiddleware, so
+they add no extra task per request and keep streaming responses streaming.
+"""
+import logging
+import time
+from typing import Optional
+
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.db import DatabaseStats, database_stats
+from src.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_PROGRESS,
+    LOAD_SHED_REJECTED,
+)
+from src.monitor import LoopLagMonitor
+from src.settings import settings
+
+
+class ServerTimingMiddleware:
+    """
+    Report per request timings in the Server-Timing response header:
+    db-conn is the time pooled database connections were held so far, including
+    connections not returned before the response started (with the number of
+    checkouts as description), db the time spent executing statements (with the
+    number of statements as description) and app the time until the response
+    started. Requests running the same statement DB_REPEATED_STATEMENT_WARNING
+    times or more are logged as likely N+1 queries.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = DatabaseStats(parent=database_stats.get())
+        token = database_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                hold_time = stats.current_hold_time()
+                elapsed = time.perf_counter() - start
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db-conn;dur={hold_time * 1000:.1f};desc="{stats.checkouts}", '
+                    f'db;dur={stats.query_time * 1000:.1f};desc="{stats.queries}", '
+                    f"app;dur={elapsed * 1000:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            database_stats.reset(token)
+            threshold = settings.DB_REPEATED_STATEMENT_WARNING
+            for statement, count in stats.repeated_statements(threshold):
+                logging.warning(
+                    f"{scope['method']} {scope['path']} ran a statement {count} times, "
+                    f"possible N+1 queries: {statement}"
+                )
+
+
+def route_label(scope: Scope, root_path: str) -> str:
+    """
+    Return the path template of the route that handled a request, from the scope
+    the router updated while routing it.
+
+    Args:
+        scope (Scope): The request scope after the request was handled.
+        root_path (str): The root path of the scope before routing.
+
+    Returns:
+        str: The template, e.g. /profile/{user_pk}, /media/profile/{path} for
+            mounted applications, or "unmatched" if no route matched.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounts extend the root path by their own path.
+    mount_path = scope.get("root_path", "")[len(root_path) :]
+    if mount_path:
+        return mount_path + "/{path}"
+    # Plain Starlette routes, e.g. /metrics, only set the endpoint.
+    endpoint = scope.get("endpoint")
+    if endpoint is not None:
+        for candidate in getattr(scope.get("app"), "routes", ()):
+            if getattr(candidate, "endpoint", None) is endpoint:
+                return candidate.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Count requests by method, route and status code and observe their latency.
+    Requests are labelled with the path template of the matched route (e.g.
+    /profile/{user_pk}), not the requested path, to keep the number of label
+    values bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+            route = route_label(scope, root_path)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            HTTP_REQUEST_DURATION.labels(method, route).observe(
+                time.perf_counter() - start
+            )
+
+
+class LoadSheddingMiddleware:
+    """
+    Reject requests with 503 and Retry-After while the worker is overloaded,
+    i.e. the event loop lags behind or too many requests are in flight, so the
+    requests already admitted can finish in time. Paths in
+    LOAD_SHED_EXEMPT_PATHS (token refresh, health checks, metrics) are always
+    admitted.
+
+    Attributes:
+        monitor (LoopLagMonitor): Source of the event loop lag.
+        in_flight (int): Requests being handled.
+    """
+
+    def __init__(self, app: ASGIApp, monitor: LoopLagMonitor) -> None:
+        self.app = app
+        self.monitor = monitor
+        self.in_flight = 0
+
+    def _overload_reason(self) -> Optional[str]:
+        if self.in_flight >= settings.LOAD_SHED_MAX_IN_FLIGHT:
+            return "in_flight"
+        if self.monitor.lag > settings.LOAD_SHED_MAX_LAG.total_seconds():
+            return "loop_lag"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in settings.LOAD_SHED_EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self._overload_reason()
+        if reason is not None:
+            LOAD_SHED_REJECTED.labels(reason).inc()
+            response = ORJSONResponse(
+                {"detail": "Server is busy, try again later"},
+                status_code=503,
+                headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
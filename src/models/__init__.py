@@ -1,16 +1,18 @@
 from typing import Tuple, Type
 
-from src.models.user import User, UserCreate, UserView, UserBase, PasswordChange, PasswordReset
+from src.models.user import User, UserCreate, UserView, UserBase, UserSnapshot, UserImport, PasswordChange, PasswordReset
 from src.models.token import TokenPayload, AccessTokenPayload, LoginResponsePayload
-from src.models.utils import MessageResponse
-from src.models.profile import Profile
+from src.models.utils import MessageResponse, BulkError, BulkResult, ProfilerReport
+from src.models.profile import Profile, ProfileBatchRequest, ProfileBatchResponse
+from src.models.outbox import Outbox, OutboxStatus
 
 from sqlmodel import SQLModel
 
-table_models: Tuple[Type[SQLModel], ...] = (User, )
+table_models: Tuple[Type[SQLModel], ...] = (User, Outbox)
 
 schema_models: Tuple[Type[SQLModel], ...] = (
     UserCreate, UserView, UserBase, TokenPayload,
     AccessTokenPayload, LoginResponsePayload, MessageResponse,
-    PasswordChange, PasswordReset
+    PasswordChange, PasswordReset, UserSnapshot, UserImport, ProfileBatchRequest,
+    ProfileBatchResponse, BulkError, BulkResult, ProfilerReport
 )
\ No newline at end of file
@@ -0,0 +1,52 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import DateTime, Index, Text, text
+from sqlmodel import AutoString, Field, SQLModel
+
+from src.models.utils import utcnow
+
+
+class OutboxStatus(str, Enum):
+    """
+    Enum representing delivery states of an outgoing email.
+
+    Attributes:
+        pending (str): Waiting to be sent, possibly after a failed attempt.
+        sent (str): Delivered to the SMTP server.
+        failed (str): Gave up after the maximum number of attempts.
+    """
+
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+
+class Outbox(SQLModel, table=True):
+    """
+    Model representing an email waiting to be sent by the outbox worker.
+    Rows are inserted in the same transaction as the change that triggers the email.
+    """
+
+    __table_args__ = (
+        Index(
+            "ix_outbox_pending_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    recipient: str = Field(sa_type=AutoString)
+    subject: str
+    body: str = Field(sa_type=Text)
+    status: OutboxStatus = OutboxStatus.pending
+    attempts: int = 0
+    last_error: Optional[str] = Field(default=None, sa_type=Text)
+    created_at: datetime = Field(default_factory=utcnow, sa_type=DateTime(timezone=True))
+    next_attempt_at: datetime = Field(
+        default_factory=utcnow, sa_type=DateTime(timezone=True)
+    )
+    sent_at: Optional[datetime] = Field(default=None, sa_type=DateTime(timezone=True))
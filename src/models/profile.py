@@ -1,20 +1,61 @@
+from datetime import datetime
+from typing import Dict, List
 from uuid import UUID, uuid4
 
+from sqlalchemy import DateTime, ForeignKey
 from sqlmodel import Field, Relationship, SQLModel
 
+from src.avatars import avatar_pool
 from src.models import User
-from src.utils import generate_avatar, generate_one_username
+from src.models.utils import utcnow
+from src.settings import settings
+from src.utils import generate_one_username
 
 
 class Profile(SQLModel, table=True):
     """
     Represents the data required to create a profile.
     The profile is created after the user successfully verifies their email.
+    updated_at changes on every update and serves as the profile version (ETag).
     """
 
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
     username: str = Field(default_factory=generate_one_username)
-    picture: str = Field(default_factory=generate_avatar)
+    picture: str = Field(default_factory=avatar_pool.claim)
+    updated_at: datetime = Field(
+        default_factory=utcnow,
+        sa_type=DateTime(timezone=True),
+        sa_column_kwargs={"onupdate": utcnow},
+    )
 
-    user_id: UUID = Field(default=None, foreign_key="user.id", unique=True)
+    # Deleted with the user by the database, bulk deletes bypass ORM cascades.
+    user_id: UUID = Field(
+        default=None,
+        sa_column_args=(ForeignKey("user.id", ondelete="CASCADE"),),
+        unique=True,
+    )
     user: User = Relationship(back_populates="profile")
+
+
+class ProfileBatchRequest(SQLModel):
+    """
+    Model for requesting several profiles at once.
+
+    Attributes:
+        ids (List[UUID]): Primary keys of the users whose profiles are requested.
+    """
+
+    ids: List[UUID] = Field(max_length=settings.PROFILE_BATCH_MAX_SIZE)
+
+
+class ProfileBatchResponse(SQLModel):
+    """
+    Model for the profiles found by a batch request.
+
+    Attributes:
+        profiles (Dict[UUID, Profile]): Found profiles by user primary key.
+        missing (List[UUID]): Requested user primary keys without a profile.
+    """
+
+    profiles: Dict[UUID, Profile]
+    missing: List[UUID]
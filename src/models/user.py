@@ -68,6 +68,24 @@ class UserCreate(UserBase):
         return password
 
 
+class UserImport(UserCreate):
+    """
+    Model for a user row of a bulk import file.
+
+    Inherits:
+        UserCreate: Model for creating a new user.
+
+    Attributes:
+        role (RoleEnum): The role of the user.
+        is_active (bool): Imported users are active unless stated otherwise.
+        username (str | None): Username of the profile, generated if missing.
+    """
+
+    role: RoleEnum = RoleEnum.customer
+    is_active: bool = True
+    username: Optional[str] = None
+
+
 class UserView(UserBase):
     """
     Model for viewing user details without sensitive data.
@@ -85,6 +103,22 @@ class UserView(UserBase):
     is_active: bool = Field(default=False)
 
 
+class UserSnapshot(SQLModel):
+    """
+    Model holding the user attributes needed to authorize a request.
+    Kept small so it can be cached between requests.
+
+    Attributes:
+        id (UUID): The unique identifier for the user.
+        role (RoleEnum): The role of the user.
+        is_active (bool): Flag indicating if the user account is active.
+    """
+
+    id: UUID
+    role: RoleEnum
+    is_active: bool
+
+
 class User(UserCreate, UserView, table=True):
     """
     Model representing a user in database.
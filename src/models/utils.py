@@ -1,5 +1,69 @@
+from datetime import datetime, timezone
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
 from sqlmodel import SQLModel
 
+T = TypeVar("T")
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 
 class MessageResponse(SQLModel):
     message: str
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Model representing one page of a cursor paginated list.
+
+    Attributes:
+        items (List[T]): Objects of the page.
+        next_cursor (str | None): Opaque cursor of the next page, None on the last page.
+    """
+
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class BulkError(SQLModel):
+    """
+    Model representing a row a bulk operation could not write.
+
+    Attributes:
+        index (int): Position of the row in the input.
+        detail (str): Why the row was not written.
+    """
+
+    index: int
+    detail: str
+
+
+class BulkResult(SQLModel):
+    """
+    Model representing the outcome of a bulk operation.
+
+    Attributes:
+        succeeded (int): Number of written rows.
+        errors (List[BulkError]): Rows that were not written, ordered by index.
+    """
+
+    succeeded: int = 0
+    errors: List[BulkError] = []
+
+
+class ProfilerReport(SQLModel):
+    """
+    Model representing a stored request profile.
+
+    Attributes:
+        name (str): File name of the report.
+        size (int): Size of the report in bytes.
+        created_at (datetime): When the report was stored.
+    """
+
+    name: str
+    size: int
+    created_at: datetime
@@ -0,0 +1,58 @@
+"""
+Event loop lag monitor.
+
+Blocking calls (CPU bound work, synchronous IO) stall the event loop and delay
+every request of the worker. The monitor schedules a sleep every interval and
+measures how late it wakes up, which is the time a ready callback currently waits
+before it runs.
+"""
+import asyncio
+from datetime import timedelta
+
+from src.metrics import EVENT_LOOP_LAG
+from src.settings import settings
+
+
+class LoopLagMonitor:
+    """
+    Periodically sample the event loop scheduling delay.
+
+    Attributes:
+        interval (timedelta): Time between samples.
+        lag (float): Smoothed lag in seconds. Rises to a new maximum immediately
+            and decays over a few samples, so single spikes are not forgotten at
+            once.
+    """
+
+    # Weight of the previous lag when the new sample is lower.
+    DECAY = 0.5
+
+    def __init__(self, interval: timedelta) -> None:
+        self.interval = interval
+        self.lag = 0.0
+
+    def record(self, sample: float) -> None:
+        """
+        Add a lag sample in seconds.
+        """
+        sample = max(sample, 0.0)
+        if sample >= self.lag:
+            self.lag = sample
+        else:
+            self.lag = self.DECAY * self.lag + (1 - self.DECAY) * sample
+        EVENT_LOOP_LAG.set(self.lag)
+
+    async def run(self) -> None:
+        """
+        Keep sampling. Meant to run as a background task for the lifetime of the
+        application.
+        """
+        loop = asyncio.get_running_loop()
+        interval = self.interval.total_seconds()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.record(loop.time() - start - interval)
+
+
+loop_lag_monitor = LoopLagMonitor(settings.LOOP_LAG_INTERVAL)
@@ -0,0 +1,266 @@
+"""
+Opt-in sampling profiler for single requests.
+
+A request is profiled when it carries a valid X-Profile header (see
+sign_profile_request, or python -m src.cli profile-token) or is picked by
+PROFILER_SAMPLE_RATE. While it is handled, a background thread samples the stack
+of the event loop thread every PROFILER_INTERVAL. The samples are stored as a
+collapsed stack report (one "frame;frame;frame count" line per stack), which
+flamegraph.pl, speedscope and inferno read, and can be downloaded from
+/admin/profiles.
+
+The event loop runs other requests while a profiled request awaits, so their
+frames show up in the report too, as does the time the loop spends idle waiting
+for IO (in the selector frames). At most one request per worker is profiled at a
+time.
+
+Without PROFILER_SECRET and PROFILER_SAMPLE_RATE the middleware is not installed
+at all, so the profiler costs nothing unless enabled.
+"""
+import asyncio
+import functools
+import hashlib
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import CodeType
+from typing import List, Optional, Tuple
+from uuid import uuid4
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.models import ProfilerReport
+from src.settings import settings
+
+PROFILE_HEADER = "X-Profile"
+REPORT_HEADER = "X-Profile-Report"
+REPORT_SUFFIX = ".collapsed"
+REPORT_NAME = re.compile(r"^[\w-]+\.collapsed$")
+# Longer X-Profile values are rejected without parsing them.
+MAX_PROFILE_HEADER_LENGTH = 128
+
+
+def sign_profile_request(secret: str, expires: int) -> str:
+    """
+    Build an X-Profile header value valid until the given time.
+
+    Args:
+        secret (str): PROFILER_SECRET.
+        expires (int): Unix timestamp after which the value is rejected.
+
+    Returns:
+        str: The header value, "<expires>.<signature>".
+    """
+    signature = hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256)
+    return f"{expires}.{signature.hexdigest()}"
+
+
+def verify_profile_request(secret: str, value: str) -> bool:
+    """
+    Check that an X-Profile header value is signed with the secret and not expired.
+    """
+    if len(value) > MAX_PROFILE_HEADER_LENGTH:
+        return False
+    expires, _, _ = value.partition(".")
+    try:
+        expires_at = int(expires)
+    except ValueError:
+        return False
+    if expires_at < time.time():
+        return False
+    expected = sign_profile_request(secret, expires_at)
+    # Bytes, compare_digest rejects strings with non-ASCII characters.
+    return hmac.compare_digest(value.encode(), expected.encode())
+
+
+@functools.lru_cache(maxsize=4096)
+def code_label(code: CodeType) -> str:
+    """
+    Name the function of a code object, e.g. "login (src/endpoints/auth.py:80)".
+    Memoized, the same functions show up in sample after sample.
+    """
+    filename = os.path.relpath(code.co_filename)
+    if filename.startswith(".."):
+        filename = code.co_filename
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """
+    Sample the stack of a thread from a background thread.
+
+    Attributes:
+        thread_id (int): Identifier of the sampled thread.
+        interval (timedelta): Time between samples.
+        stacks (Counter[Tuple[CodeType, ...]]): Number of samples per stack of
+            code objects, innermost frame first. They are only named when the
+            report is built, so sampling does little work while holding the GIL.
+    """
+
+    def __init__(self, thread_id: int, interval: timedelta) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[Tuple[CodeType, ...]] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def sample(self) -> None:
+        """
+        Record the current stack of the sampled thread.
+        """
+        frame = sys._current_frames().get(self.thread_id)
+        codes: List[CodeType] = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+        if codes:
+            self.stacks[tuple(codes)] += 1
+
+    def _run(self) -> None:
+        interval = self.interval.total_seconds()
+        while not self._stopped.wait(interval):
+            self.sample()
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """
+        Return the samples in the collapsed stack format.
+        """
+        lines: Counter[str] = Counter()
+        for codes, count in self.stacks.items():
+            lines[";".join(code_label(code) for code in reversed(codes))] += count
+        return "".join(f"{stack} {count}\n" for stack, count in lines.items())
+
+
+class ProfileStore:
+    """
+    Directory of profiler reports, keeping the newest max_reports.
+
+    Attributes:
+        root (str): Directory the reports are stored in.
+        max_reports (int): Number of reports kept, older ones are removed.
+    """
+
+    def __init__(self, root: str, max_reports: int) -> None:
+        self.root = root
+        self.max_reports = max_reports
+
+    @staticmethod
+    def new_name(method: str, path: str) -> str:
+        """
+        Name a report of a request, names sort by creation time.
+        """
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        return f"{timestamp}-{method}-{slug[:64]}-{uuid4().hex[:8]}{REPORT_SUFFIX}"
+
+    def path_for(self, name: str) -> Optional[str]:
+        """
+        Return the path of a stored report, None if there is no such report.
+        """
+        if not REPORT_NAME.match(name):
+            return None
+        path = os.path.join(self.root, name)
+        return path if os.path.isfile(path) else None
+
+    def list(self) -> List[ProfilerReport]:
+        """
+        List the stored reports, newest first.
+        """
+        if not os.path.isdir(self.root):
+            return []
+        reports = []
+        for entry in os.scandir(self.root):
+            if entry.is_file() and REPORT_NAME.match(entry.name):
+                stat = entry.stat()
+                reports.append(
+                    ProfilerReport(
+                        name=entry.name,
+                        size=stat.st_size,
+                        created_at=datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                    )
+                )
+        return sorted(reports, key=lambda report: report.name, reverse=True)
+
+    def save_sync(self, name: str, report: str) -> None:
+        """
+        Store a report and remove the oldest reports beyond max_reports.
+        Blocking, prefer save from async code.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".{name}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(report)
+        os.replace(tmp_path, os.path.join(self.root, name))
+        for old in self.list()[self.max_reports :]:
+            os.remove(os.path.join(self.root, old.name))
+
+    async def save(self, name: str, report: str) -> None:
+        """
+        Store a report in a worker thread.
+        """
+        await asyncio.to_thread(self.save_sync, name, report)
+
+
+class ProfilerMiddleware:
+    """
+    Profile requests carrying a valid X-Profile header or picked by
+    PROFILER_SAMPLE_RATE. The name of the stored report is returned in the
+    X-Profile-Report response header.
+
+    Attributes:
+        store (ProfileStore): Where reports are stored.
+        active (bool): Whether a request is being profiled.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore) -> None:
+        self.app = app
+        self.store = store
+        self.active = False
+
+    def _should_profile(self, scope: Scope) -> bool:
+        if self.active:
+            return False
+        value = Headers(scope=scope).get(PROFILE_HEADER)
+        if value and settings.PROFILER_SECRET:
+            if verify_profile_request(settings.PROFILER_SECRET, value):
+                return True
+        return random.random() < settings.PROFILER_SAMPLE_RATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = self.store.new_name(scope["method"], scope["path"])
+
+        async def send_with_report(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append(REPORT_HEADER, name)
+            await send(message)
+
+        self.active = True
+        sampler = StackSampler(threading.get_ident(), settings.PROFILER_INTERVAL)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_report)
+        finally:
+            sampler.stop()
+            self.active = False
+            await self.store.save(name, sampler.collapsed())
+
+
+profile_store = ProfileStore(settings.PROFILER_DIR, settings.PROFILER_MAX_REPORTS)
@@ -1,10 +1,10 @@
 """
 This module provides configuration settings and utilities for the application.
 """
-import logging
 import sys
 from datetime import timedelta
-from typing import Union
+from typing import Any, Dict, List, Literal, Optional, Union
+from uuid import uuid4
 
 from mako.lookup import TemplateLookup
 from passlib.context import CryptContext
@@ -14,6 +14,16 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.logs import setup_logging
+
+
+def unique_statement_name() -> str:
+    """
+    Name prepared statements uniquely, so they never clash on a server connection
+    shared through PgBouncer.
+    """
+    return f"__asyncpg_{uuid4()}__"
+
 
 class Settings(BaseSettings):
     """
@@ -25,6 +35,26 @@ class Settings(BaseSettings):
     DB_NAME: str
     DB_USER: str
     DB_PASSWORD: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds to wait for a pooled connection before raising.
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: timedelta = timedelta(minutes=30)
+    # Pinging costs a round trip per checkout, pool recycling already replaces old
+    # connections. Enable behind proxies that drop idle connections early.
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    # Seconds a statement may run before it is cancelled, no limit if unset.
+    DB_COMMAND_TIMEOUT: Optional[float] = None
+    # Transaction pooling (PgBouncer) mode: no prepared statements are reused.
+    DB_PGBOUNCER_MODE: bool = False
+    # postgresql+asyncpg:// URLs of read replicas, JSON list in the environment.
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_CHECK_INTERVAL: timedelta = timedelta(seconds=5)
+    DB_REPLICA_CHECK_TIMEOUT: float = 2
+    # Warn when a request runs the same statement this many times (N+1 queries).
+    DB_REPEATED_STATEMENT_WARNING: int = 10
 
     SECRET_KEY: str
     ALGORITHM: str
@@ -35,6 +65,70 @@ class Settings(BaseSettings):
 
     EMAIL_SENDER: EmailStr
     EMAIL_PASSWORD: str
+    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_PORT: int = 587
+    SMTP_START_TLS: bool = True
+    SMTP_MAX_CONNECTIONS: int = 4
+    SMTP_TIMEOUT: float = 30
+    SMTP_IDLE_TIMEOUT: timedelta = timedelta(minutes=1)
+
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_INTERVAL: timedelta = timedelta(seconds=2)
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_RETRY_BACKOFF: timedelta = timedelta(seconds=30)
+    # Claimed rows are due again after this long, in case the worker sending them
+    # dies. Has to exceed the time a batch takes to send.
+    OUTBOX_CLAIM_TIMEOUT: timedelta = timedelta(minutes=5)
+
+    AVATAR_POOL_LOW_WATERMARK: int = 20
+    AVATAR_POOL_HIGH_WATERMARK: int = 100
+    MEDIA_GC_GRACE: timedelta = timedelta(days=1)
+
+    PROFILE_BATCH_MAX_SIZE: int = 100
+    PAGE_SIZE: int = 50
+    PAGE_MAX_SIZE: int = 500
+    # Rows per statement of bulk writes, bounded by the 32767 parameters per query.
+    BULK_CHUNK_SIZE: int = 1000
+    # Rows fetched from the server-side cursor at a time by exports.
+    EXPORT_YIELD_PER: int = 1000
+
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    USER_CACHE_SIZE: int = 10_000
+    USER_CACHE_TTL: timedelta = timedelta(seconds=30)
+
+    TOKEN_CACHE_SIZE: int = 10_000
+    TOKEN_CACHE_TTL: timedelta = timedelta(minutes=5)
+
+    LOOP_LAG_INTERVAL: timedelta = timedelta(milliseconds=100)
+    # Requests are rejected with 503 while the event loop lags behind more than
+    # LOAD_SHED_MAX_LAG or LOAD_SHED_MAX_IN_FLIGHT requests are being handled.
+    LOAD_SHED_MAX_LAG: timedelta = timedelta(milliseconds=250)
+    LOAD_SHED_MAX_IN_FLIGHT: int = 200
+    LOAD_SHED_EXEMPT_PATHS: List[str] = ["/auth/refresh", "/health", "/metrics"]
+    LOAD_SHED_RETRY_AFTER: int = 1
+
+    LOG_LEVEL: str = "WARNING"
+    # Logs go to stderr when LOG_FILE is empty. The file is written by a single
+    # process only, with several workers (PROMETHEUS_MULTIPROC_DIR) logs go to stderr.
+    LOG_FILE: Optional[str] = "app.log"
+    LOG_JSON: bool = False
+    # Size at which the log file is rotated, 0 never rotates.
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT: int = 5
+    # Records buffered for the log writer thread, further records are dropped.
+    LOG_QUEUE_SIZE: int = 10_000
+
+    # The request profiler is only installed if PROFILER_SECRET (to profile
+    # requests with a signed X-Profile header) or PROFILER_SAMPLE_RATE is set.
+    PROFILER_SECRET: Optional[str] = None
+    PROFILER_SAMPLE_RATE: float = 0.0
+    PROFILER_INTERVAL: timedelta = timedelta(milliseconds=5)
+    # Shared by all workers, PROFILER_MAX_REPORTS is the limit of the directory.
+    PROFILER_DIR: str = "profiles"
+    PROFILER_MAX_REPORTS: int = 100
 
     @property
     def postgres_url(self) -> PostgresDsn:
@@ -43,6 +137,42 @@ class Settings(BaseSettings):
         """
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    @property
+    def profiler_enabled(self) -> bool:
+        """
+        Computed property telling whether requests can be profiled.
+        """
+        return bool(self.PROFILER_SECRET) or self.PROFILER_SAMPLE_RATE > 0
+
+    @property
+    def engine_options(self) -> Dict[str, Any]:
+        """
+        Computed property returning create_async_engine keyword arguments.
+
+        In PgBouncer mode both the asyncpg and the SQLAlchemy statement caches are
+        disabled and prepared statements get unique names, as consecutive
+        transactions may run on different server connections.
+        """
+        connect_args: Dict[str, Any] = {
+            "statement_cache_size": self.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": self.DB_PREPARED_STATEMENT_CACHE_SIZE,
+            "command_timeout": self.DB_COMMAND_TIMEOUT,
+        }
+        if self.DB_PGBOUNCER_MODE:
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=unique_statement_name,
+            )
+        return {
+            "pool_size": self.DB_POOL_SIZE,
+            "max_overflow": self.DB_MAX_OVERFLOW,
+            "pool_timeout": self.DB_POOL_TIMEOUT,
+            "pool_recycle": int(self.DB_POOL_RECYCLE.total_seconds()),
+            "pool_pre_ping": self.DB_POOL_PRE_PING,
+            "connect_args": connect_args,
+        }
+
 
 class TestSettings(Settings):
     """
@@ -69,7 +199,7 @@ def get_settings() -> Union[Settings, TestSettings]:
 settings = get_settings()
 
 
-engine = create_async_engine(settings.postgres_url)
+engine = create_async_engine(settings.postgres_url, **settings.engine_options)
 async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 pwd_cxt = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -78,8 +208,11 @@ pwd_cxt = CryptContext(schemes=["bcrypt"], deprecated="auto")
 lookup = TemplateLookup(directories=["src/templates"])
 
 # logger
-logging.basicConfig(
-    filename="app.log",
-    level=logging.WARNING,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+log_listener = setup_logging(
+    level=settings.LOG_LEVEL,
+    filename=settings.LOG_FILE or None,
+    json=settings.LOG_JSON,
+    max_bytes=settings.LOG_MAX_BYTES,
+    backup_count=settings.LOG_BACKUP_COUNT,
+    queue_size=settings.LOG_QUEUE_SIZE,
 )
@@ -0,0 +1,176 @@
+"""
+Pool of long-lived, authenticated SMTP connections.
+"""
+import asyncio
+import time
+from collections import deque
+from email.message import EmailMessage
+from typing import Deque, List, Optional, Sequence, Tuple
+
+import aiosmtplib
+
+from src.metrics import EMAILS_SENT
+from src.settings import settings
+
+# Errors after which the connection can not be used anymore.
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    OSError,
+)
+
+
+class SMTPPool:
+    """
+    Keep authenticated SMTP connections warm and reuse them for many messages,
+    instead of doing a TCP + TLS + AUTH handshake for every email.
+
+    Attributes:
+        hostname (str): SMTP server host.
+        port (int): SMTP server port.
+        username (str | None): Login user, no login is performed when empty.
+        password (str | None): Login password.
+        start_tls (bool): Upgrade the connection with STARTTLS.
+        max_connections (int): Maximum number of concurrently open connections.
+        timeout (float): Timeout in seconds for SMTP operations.
+        idle_timeout (float): Idle connections older than this (seconds) are
+            reopened, SMTP servers usually drop them on their side.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str],
+        password: Optional[str],
+        start_tls: bool,
+        max_connections: int,
+        timeout: float,
+        idle_timeout: float,
+    ) -> None:
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.start_tls = start_tls
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._idle: Deque[Tuple[aiosmtplib.SMTP, float]] = deque()
+        self._semaphore = asyncio.Semaphore(max_connections)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """
+        Open a new connection, upgrade it to TLS and log in.
+        """
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            start_tls=self.start_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        return client
+
+    @staticmethod
+    async def _close(client: aiosmtplib.SMTP) -> None:
+        """
+        Close a connection, politely if it is still alive.
+        """
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        """
+        Take the most recently used healthy idle connection or open a new one.
+        """
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if client.is_connected and time.monotonic() - last_used < self.idle_timeout:
+                return client
+            await self._close(client)
+        return await self._connect()
+
+    def _release(self, client: aiosmtplib.SMTP) -> None:
+        """
+        Return a connection to the pool.
+        """
+        self._idle.append((client, time.monotonic()))
+
+    async def send_messages(
+        self, messages: Sequence[EmailMessage]
+    ) -> List[Optional[Exception]]:
+        """
+        Send messages over a single pooled connection. A broken connection is
+        reopened and the message retried once.
+
+        Args:
+            messages (Sequence[EmailMessage]): Messages to send.
+
+        Returns:
+            List[Optional[Exception]]: Per message outcome, None when it was sent or
+            the error that prevented sending it.
+        """
+        results: List[Optional[Exception]] = []
+        async with self._semaphore:
+            client: Optional[aiosmtplib.SMTP] = None
+            for message in messages:
+                for attempt in range(2):
+                    try:
+                        if client is None:
+                            client = await self._acquire()
+                        await client.send_message(message)
+                    except CONNECTION_ERRORS as e:
+                        if client is not None:
+                            client.close()
+                            client = None
+                        if attempt:
+                            results.append(e)
+                        continue
+                    except aiosmtplib.SMTPException as e:
+                        results.append(e)
+                    else:
+                        results.append(None)
+                    break
+            if client is not None:
+                self._release(client)
+        for error in results:
+            EMAILS_SENT.labels("sent" if error is None else "failed").inc()
+        return results
+
+    async def send_message(self, message: EmailMessage) -> None:
+        """
+        Send a single message over a pooled connection.
+
+        Raises:
+            SMTPException: If the message could not be sent.
+        """
+        (error,) = await self.send_messages([message])
+        if error is not None:
+            raise error
+
+    async def close(self) -> None:
+        """
+        Close all idle connections.
+        """
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._close(client)
+
+
+smtp_pool = SMTPPool(
+    hostname=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.EMAIL_SENDER,
+    password=settings.EMAIL_PASSWORD,
+    start_tls=settings.SMTP_START_TLS,
+    max_connections=settings.SMTP_MAX_CONNECTIONS,
+    timeout=settings.SMTP_TIMEOUT,
+    idle_timeout=settings.SMTP_IDLE_TIMEOUT.total_seconds(),
+)
@@ -1,20 +1,25 @@
 import logging
 from email.message import EmailMessage
 
-import aiosmtplib
 from pydantic import EmailStr
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.models import Outbox
 from src.settings import lookup, settings
+from src.smtp import smtp_pool
 
 
-async def send_mail(send_to: EmailStr, subject: str, context: str) -> None:
+def build_mail(send_to: EmailStr, subject: str, context: str) -> EmailMessage:
     """
-    Send an email with the specified subject and content.
+    Build an html email message.
 
     Args:
         send_to (EmailStr): The recipient's email address.
         subject (str): The subject of the email.
         context (str): The content of the email.
+
+    Returns:
+        EmailMessage: The message ready to be sent.
     """
     em = EmailMessage()
     em["From"] = settings.EMAIL_SENDER
@@ -22,54 +27,87 @@ async def send_mail(send_to: EmailStr, subject: str, context: str) -> None:
     em["Subject"] = subject
 
     em.add_alternative(context, subtype="html")
+    return em
+
+
+async def send_mail(send_to: EmailStr, subject: str, context: str) -> None:
+    """
+    Send an email with the specified subject and content over a pooled SMTP connection.
+
+    Args:
+        send_to (EmailStr): The recipient's email address.
+        subject (str): The subject of the email.
+        context (str): The content of the email.
+    """
+    em = build_mail(send_to, subject, context)
     try:
-        await aiosmtplib.send(
-            em,
-            hostname="smtp.gmail.com",
-            port=587,
-            start_tls=True,
-            username=settings.EMAIL_SENDER,
-            password=settings.EMAIL_PASSWORD,
-        )
+        await smtp_pool.send_message(em)
     except Exception as e:
         logging.error(e)
 
 
+def queue_mail(
+    session: AsyncSession, send_to: EmailStr, subject: str, context: str
+) -> Outbox:
+    """
+    Add an email to the outbox. It is sent by the outbox worker (src/worker.py)
+    once the session is committed.
+
+    Args:
+        session (AsyncSession): The database session.
+        send_to (EmailStr): The recipient's email address.
+        subject (str): The subject of the email.
+        context (str): The content of the email.
+
+    Returns:
+        Outbox: The queued outbox row.
+    """
+    outbox = Outbox(recipient=send_to, subject=subject, body=context)
+    session.add(outbox)
+    return outbox
+
+
 send_verification_template = lookup.get_template("activate_account_email.html")
 
 
-async def send_verification_email(mail: EmailStr, one_time_jwt: str) -> None:
+def queue_verification_email(
+    session: AsyncSession, mail: EmailStr, one_time_jwt: str
+) -> Outbox:
     """
-    Send a verification email with a one-time JWT token to activate user.
+    Queue a verification email with a one-time JWT token to activate user.
 
     Args:
+        session (AsyncSession): The database session.
         mail (EmailStr): The recipient's email address.
         one_time_jwt (str): The one-time JWT token for email verification.
 
     Returns:
-        None
+        Outbox: The queued outbox row.
     """
     verification_endpoint = settings.FRONTEND_URL + "/verify?token="
     verification_url = verification_endpoint + one_time_jwt
     email_html = send_verification_template.render(verification_url=verification_url)
-    await send_mail(mail, "Verify Email", email_html)
+    return queue_mail(session, mail, "Verify Email", email_html)
 
 
 send_password_reset_template = lookup.get_template("activate_account_email.html")
 
 
-async def send_password_reset_email(mail: EmailStr, one_time_jwt: str) -> None:
+def queue_password_reset_email(
+    session: AsyncSession, mail: EmailStr, one_time_jwt: str
+) -> Outbox:
     """
-    Send email with a one-time JWT token to reset users password.
+    Queue email with a one-time JWT token to reset users password.
 
     Args:
+        session (AsyncSession): The database session.
         mail (EmailStr): The recipient's email address.
         one_time_jwt (str): The one-time JWT token for email verification.
 
     Returns:
-        None
+        Outbox: The queued outbox row.
     """
     verification_endpoint = settings.FRONTEND_URL + "/auth/reset-password?token="
     verification_url = verification_endpoint + one_time_jwt
     email_html = send_password_reset_template.render(verification_url=verification_url)
-    await send_mail(mail, "Verify Email", email_html)
+    return queue_mail(session, mail, "Verify Email", email_html)
@@ -1,5 +1,3 @@
-from uuid import uuid4
-
 import python_avatars as pa
 from random_username.generate import generate_username
 
@@ -9,8 +7,6 @@ def generate_one_username() -> str:
     return username
 
 
-def generate_avatar() -> str:
+def render_avatar() -> bytes:
     random_avatar = pa.Avatar.random(style=pa.AvatarStyle.TRANSPARENT)
-    avatar_path = f"media/profile/{uuid4().hex}.svg"
-    random_avatar.render(avatar_path)
-    return avatar_path
+    return random_avatar.render().encode()
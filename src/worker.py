@@ -0,0 +1,136 @@
+"""
+Outbox worker sending queued emails outside of the API process.
+
+Run with: python -m src.worker
+"""
+import asyncio
+import logging
+import signal
+from typing import List, Optional, Sequence
+
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models import Outbox, OutboxStatus
+from src.models.utils import utcnow
+from src.settings import async_session, settings
+from src.smtp import smtp_pool
+from src.tasks import build_mail
+
+
+async def send_outbox_rows(rows: Sequence[Outbox]) -> List[Optional[Exception]]:
+    """
+    Send outbox rows concurrently, spreading them over the SMTP pool connections.
+
+    Args:
+        rows (Sequence[Outbox]): Rows to send.
+
+    Returns:
+        List[Optional[Exception]]: Per row outcome, None when the email was sent.
+    """
+    connections = min(smtp_pool.max_connections, len(rows))
+    chunks = [rows[i::connections] for i in range(connections)]
+    chunk_results = await asyncio.gather(
+        *(
+            smtp_pool.send_messages(
+                [build_mail(row.recipient, row.subject, row.body) for row in chunk]
+            )
+            for chunk in chunks
+        )
+    )
+    results: List[Optional[Exception]] = [None] * len(rows)
+    for i, chunk_result in enumerate(chunk_results):
+        results[i::connections] = chunk_result
+    return results
+
+
+async def process_outbox_batch(session: AsyncSession) -> int:
+    """
+    Claim a batch of due outbox rows, send them and record the outcome.
+
+    Rows are locked with SELECT ... FOR UPDATE SKIP LOCKED, so several workers can
+    run side by side without sending the same email twice. The claim counts the
+    attempt and pushes next_attempt_at OUTBOX_CLAIM_TIMEOUT ahead, then commits,
+    so neither row locks nor a connection are held while sending. Rows of a
+    worker dying mid-batch are due again once the claim times out. Failed rows
+    are retried with exponential backoff until OUTBOX_MAX_ATTEMPTS is reached.
+
+    Args:
+        session (AsyncSession): The database session.
+
+    Returns:
+        int: The number of processed rows.
+    """
+    statement = (
+        select(Outbox)
+        .where(Outbox.status == OutboxStatus.pending)
+        .where(Outbox.next_attempt_at <= utcnow())
+        .order_by(col(Outbox.next_attempt_at))
+        .limit(settings.OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.exec(statement)
+    rows = result.all()
+    if not rows:
+        await session.commit()
+        return 0
+
+    claimed_until = utcnow() + settings.OUTBOX_CLAIM_TIMEOUT
+    for row in rows:
+        row.attempts += 1
+        row.next_attempt_at = claimed_until
+    session.add_all(rows)
+    await session.commit()
+
+    errors = await send_outbox_rows(rows)
+
+    now = utcnow()
+    for row, error in zip(rows, errors):
+        if error is None:
+            row.status = OutboxStatus.sent
+            row.sent_at = now
+            row.last_error = None
+        else:
+            logging.error(error)
+            row.last_error = str(error)
+            if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                row.status = OutboxStatus.failed
+            else:
+                backoff = settings.OUTBOX_RETRY_BACKOFF * 2 ** (row.attempts - 1)
+                row.next_attempt_at = now + backoff
+        session.add(row)
+    await session.commit()
+    return len(rows)
+
+
+async def run_worker(stop: asyncio.Event) -> None:
+    """
+    Process outbox batches until the stop event is set. Sleeps for
+    OUTBOX_POLL_INTERVAL whenever a batch was not full.
+    """
+    poll_interval = settings.OUTBOX_POLL_INTERVAL.total_seconds()
+    while not stop.is_set():
+        try:
+            async with async_session() as session:
+                processed = await process_outbox_batch(session)
+        except Exception as e:
+            logging.exception(e)
+            processed = 0
+        if processed < settings.OUTBOX_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    await smtp_pool.close()
+
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await run_worker(stop)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
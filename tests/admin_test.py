@@ -0,0 +1,92 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import orjson
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.JWT import JWTToken
+from src.models import Profile
+from src.models.user import RoleEnum
+from src.profiler import ProfileStore
+from tests.utils import create_user
+
+
+async def create_admin_headers(db_session: AsyncSession) -> dict:
+    admin = await create_user(db_session, "admin@example.com", "String123", True)
+    admin.role = RoleEnum.admin
+    db_session.add(admin)
+    await db_session.commit()
+    return {"Authorization": f"Bearer {JWTToken(admin.id).get_access_token()}"}
+
+
+async def test_export_users(client: AsyncClient, db_session: AsyncSession) -> None:
+    """
+    Test that users are exported as NDJSON without their passwords.
+    """
+    headers = await create_admin_headers(db_session)
+    users = [
+        await create_user(db_session, f"user{i}@example.com", "String123")
+        for i in range(3)
+    ]
+
+    response = await client.get("/admin/export/user", headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 4
+    assert {row["email"] for row in rows} >= {user.email for user in users}
+    assert all(set(row) == {"id", "email", "role", "is_active"} for row in rows)
+
+
+async def test_export_profiles(client: AsyncClient, db_session: AsyncSession) -> None:
+    """
+    Test that profiles are exported as NDJSON.
+    """
+    headers = await create_admin_headers(db_session)
+    user = await create_user(db_session, "user@example.com", "String123", True)
+    profile = Profile(user=user)
+    db_session.add(profile)
+    await db_session.commit()
+
+    response = await client.get("/admin/export/profile", headers=headers)
+
+    assert response.status_code == 200
+    rows = [orjson.loads(line) for line in response.text.splitlines()]
+    assert [row["user_id"] for row in rows] == [str(user.id)]
+
+
+async def test_export_requires_admin(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test that only admins can export data.
+    """
+    user = await create_user(db_session, "user@example.com", "String123", True)
+    headers = {"Authorization": f"Bearer {JWTToken(user.id).get_access_token()}"}
+
+    response = await client.get("/admin/export/user", headers=headers)
+    assert response.status_code == 403
+
+
+async def test_download_profiles(
+    client: AsyncClient, db_session: AsyncSession, tmp_path: Path
+) -> None:
+    """
+    Test that stored request profiles are listed and downloadable.
+    """
+    headers = await create_admin_headers(db_session)
+    store = ProfileStore(str(tmp_path), max_reports=10)
+    name = store.new_name("GET", "/profile/1")
+    store.save_sync(name, "main;handler 3\n")
+
+    with patch("src.endpoints.admin.profile_store", store):
+        listed = await client.get("/admin/profiles", headers=headers)
+        report = await client.get(f"/admin/profiles/{name}", headers=headers)
+        missing = await client.get("/admin/profiles/missing.collapsed", headers=headers)
+
+    assert [item["name"] for item in listed.json()] == [name]
+    assert report.status_code == 200
+    assert report.text == "main;handler 3\n"
+    assert missing.status_code == 404
@@ -7,10 +7,12 @@ from httpx import AsyncClient
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.deps import token_cache
+from src.hashing import password_hasher
 from src.JWT import JWTToken
-from src.models import Profile, TokenPayload
+from src.models import Outbox, Profile, TokenPayload
 from src.settings import pwd_cxt, settings
-from tests.utils import create_user
+from tests.utils import assert_max_queries, create_user
 
 
 async def test_register(client: AsyncClient) -> None:
@@ -23,7 +25,7 @@ async def test_register(client: AsyncClient) -> None:
     """
     payload = {"email": "activeuser@example.com", "password": "String123"}
 
-    with patch("src.tasks.send_mail", new_callable=AsyncMock):
+    with patch("src.tasks.send_mail", new_callable=AsyncMock), assert_max_queries(2):
         response = await client.post("/auth/register", json=payload)
         response_data = response.json()
         assert response.status_code == 200
@@ -33,6 +35,24 @@ async def test_register(client: AsyncClient) -> None:
         assert response_data["is_active"] is False
 
 
+async def test_register_queues_verification_email(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test that registration stores the verification email in the outbox
+    instead of sending it from the request.
+    """
+    payload = {"email": "activeuser@example.com", "password": "String123"}
+
+    response = await client.post("/auth/register", json=payload)
+    assert response.status_code == 200
+
+    result = await db_session.exec(select(Outbox))
+    outbox = result.one()
+    assert outbox.recipient == payload["email"]
+    assert outbox.subject == "Verify Email"
+
+
 async def test_register_invalid_passwords(client: AsyncClient) -> None:
     """
     Test the registration of a new user with invalid password.
@@ -70,6 +90,24 @@ async def test_register_existing_active_user(
     assert response.json() == {"detail": "email already exists"}
 
 
+async def test_register_twice_queues_one_email(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test that a conflicting registration is rejected without queueing an email.
+    """
+    payload = {"email": "user@example.com", "password": "String123"}
+
+    response = await client.post("/auth/register", json=payload)
+    assert response.status_code == 200
+    response = await client.post("/auth/register", json=payload)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "email already exists"}
+
+    result = await db_session.exec(select(Outbox))
+    assert len(result.all()) == 1
+
+
 async def test_register_existing_inactive_user(
     client: AsyncClient, db_session: AsyncSession
 ) -> None:
@@ -103,10 +141,11 @@ async def test_login_success(client: AsyncClient, db_session: AsyncSession) -> N
     db_user = await create_user(
         db_session, payload["username"], payload["password"], is_active=True
     )
-    response = await client.post(
-        "/auth/login",
-        data={"username": payload["username"], "password": payload["password"]},
-    )
+    with assert_max_queries(1):
+        response = await client.post(
+            "/auth/login",
+            data={"username": payload["username"], "password": payload["password"]},
+        )
     assert response.status_code == 200
     response_data = response.json()
 
@@ -127,6 +166,27 @@ async def test_login_success(client: AsyncClient, db_session: AsyncSession) -> N
     assert response_data["token_type"] == "bearer"
 
 
+async def test_login_password_hasher_saturated(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test login when the password hashing backlog is full.
+
+    This test checks that requests are rejected right away with 503 instead of
+    waiting for the bcrypt executor.
+    """
+    payload = {"username": "existinguser@example.com", "password": "String123"}
+    await create_user(
+        db_session, payload["username"], payload["password"], is_active=True
+    )
+
+    with patch.object(password_hasher, "max_pending", 0):
+        response = await client.post("/auth/login", data=payload)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
 async def test_login_non_existent_user(client: AsyncClient) -> None:
     """
     Test login with non-existent user.
@@ -209,10 +269,11 @@ async def test_refresh_access_token(
 
     refresh_token = JWTToken(db_user.id).get_refresh_token()
 
-    response = await client.post(
-        "/auth/refresh",
-        headers={"Authorization": f"Bearer {refresh_token}"},
-    )
+    with assert_max_queries(0):
+        response = await client.post(
+            "/auth/refresh",
+            headers={"Authorization": f"Bearer {refresh_token}"},
+        )
 
     assert response.status_code == 200
     response_data = response.json()
@@ -228,6 +289,26 @@ async def test_refresh_access_token(
     assert access_token_data.token_type == "access"
 
 
+async def test_refresh_access_token_cached(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test that a repeatedly used refresh token is decoded only once.
+    """
+    db_user = await create_user(
+        db_session, "existinguser@example.com", "password123", is_active=True
+    )
+    refresh_token = JWTToken(db_user.id).get_refresh_token()
+    headers = {"Authorization": f"Bearer {refresh_token}"}
+
+    for _ in range(3):
+        response = await client.post("/auth/refresh", headers=headers)
+        assert response.status_code == 200
+
+    assert token_cache.misses == 1
+    assert token_cache.hits == 2
+
+
 async def test_refresh_access_expired_token(
     client: AsyncClient, db_session: AsyncSession
 ) -> None:
@@ -267,9 +348,11 @@ async def test_verify_email_success(
 
     one_time_token = JWTToken(db_user.id).get_one_time_token()
 
-    response = await client.get(
-        "/auth/verify-email", headers={"Authorization": f"Bearer {one_time_token}"}
-    )
+    # Select the user, update it and insert the profile.
+    with assert_max_queries(3):
+        response = await client.get(
+            "/auth/verify-email", headers={"Authorization": f"Bearer {one_time_token}"}
+        )
     await db_session.refresh(db_user)
 
     assert response.status_code == 200
@@ -323,11 +406,13 @@ async def test_change_password_success(
     new_password = "Newpassword123"
     old_password = "Oldpassword123"
 
-    response = await client.post(
-        "/auth/change-password",
-        json={"new_password": new_password, "old_password": old_password},
-        headers={"Authorization": f"Bearer {access_token}"},
-    )
+    # Select the current user and its password, update the password.
+    with assert_max_queries(3):
+        response = await client.post(
+            "/auth/change-password",
+            json={"new_password": new_password, "old_password": old_password},
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
 
     assert response.status_code == 200
     assert response.json() == {"message": "Password updated successfully"}
@@ -452,11 +537,12 @@ async def test_reset_password_success(
     new_password = "Newpassword123"
     one_time_token = JWTToken(user.id).get_one_time_token()
 
-    response = await client.post(
-        "/auth/reset-password",
-        json={"new_password": new_password},
-        headers={"Authorization": f"Bearer {one_time_token}"},
-    )
+    with assert_max_queries(1):
+        response = await client.post(
+            "/auth/reset-password",
+            json={"new_password": new_password},
+            headers={"Authorization": f"Bearer {one_time_token}"},
+        )
     assert response.status_code == 200
     assert response.json() == {"message": "Password reset successfully"}
 
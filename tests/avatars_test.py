@@ -0,0 +1,73 @@
+import os
+from datetime import timedelta
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.avatars import AvatarPool
+from src.media import MediaStore
+from src.models import Profile
+from tests.utils import create_user
+
+
+async def test_avatar_pool_claims_prerendered(tmp_path) -> None:
+    """
+    Test that claiming returns an avatar rendered ahead of time.
+    """
+    pool = AvatarPool(
+        MediaStore(str(tmp_path), ".svg"), low_watermark=1, high_watermark=3
+    )
+    await pool.fill()
+    assert len(pool) == 3
+
+    path = pool.claim()
+
+    assert len(pool) == 2
+    assert os.path.isfile(path)
+
+
+async def test_avatar_pool_empty_renders(tmp_path) -> None:
+    """
+    Test that an empty pool still returns a rendered avatar.
+    """
+    pool = AvatarPool(
+        MediaStore(str(tmp_path), ".svg"), low_watermark=1, high_watermark=3
+    )
+
+    path = pool.claim()
+
+    assert os.path.isfile(path)
+
+
+async def test_media_store_deduplicates(tmp_path) -> None:
+    """
+    Test that identical content is stored once in a sharded path.
+    """
+    store = MediaStore(str(tmp_path), ".svg")
+
+    path = await store.put(b"<svg></svg>")
+    same_path = await store.put(b"<svg></svg>")
+    other_path = await store.put(b"<svg/>")
+
+    assert path == same_path
+    assert path != other_path
+    assert os.path.relpath(path, tmp_path).count(os.sep) == 2
+    assert len(list(store.iter_files())) == 2
+
+
+async def test_media_store_collect_garbage(tmp_path, db_session: AsyncSession) -> None:
+    """
+    Test that only files without references are removed.
+    """
+    store = MediaStore(str(tmp_path), ".svg")
+    referenced = await store.put(b"<svg>referenced</svg>")
+    unreferenced = await store.put(b"<svg>unreferenced</svg>")
+
+    user = await create_user(db_session, "user@example.com", "Password123")
+    db_session.add(Profile(user=user, picture=referenced))
+    await db_session.commit()
+
+    removed = await store.collect_garbage(db_session, Profile.picture, timedelta(0))
+
+    assert removed == 1
+    assert os.path.isfile(referenced)
+    assert not os.path.exists(unreferenced)
@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict
+
+from benchmarks.runner import (
+    Baseline,
+    BenchmarkResult,
+    Operation,
+    compare,
+    measure,
+    run_benchmark,
+)
+
+
+def make_baseline(ops: Dict[str, float]) -> Baseline:
+    return Baseline(
+        created_at=datetime.now(timezone.utc),
+        machine={},
+        results={
+            name: BenchmarkResult(
+                ops_per_sec=value, mean=1 / value, stdev=0, rounds=1, iterations=1
+            )
+            for name, value in ops.items()
+        },
+    )
+
+
+async def test_measure_calibrates_iterations() -> None:
+    """
+    Test that fast operations are repeated until a round takes min_time.
+    """
+    calls = 0
+
+    async def operation() -> None:
+        nonlocal calls
+        calls += 1
+
+    result = await measure(operation, min_time=0.001, rounds=3)
+
+    assert result.iterations > 1
+    assert result.rounds == 3
+    assert result.ops_per_sec > 0
+    assert calls >= 3 * result.iterations
+
+
+async def test_run_benchmark_tears_down() -> None:
+    """
+    Test that the code after the yield of a benchmark runs after timing.
+    """
+    events = []
+
+    async def factory() -> AsyncIterator[Operation]:
+        events.append("setup")
+        yield lambda: None
+        events.append("teardown")
+
+    await run_benchmark(factory, min_time=0.001, rounds=1)
+
+    assert events == ["setup", "teardown"]
+
+
+def test_compare_flags_regressions(tmp_path: Path) -> None:
+    """
+    Test that throughput drops beyond the threshold are flagged as regressions.
+    """
+    path = str(tmp_path / "baseline.json")
+    make_baseline({"fast": 100, "slow": 100, "removed": 100}).save(path)
+    current = make_baseline({"fast": 120, "slow": 80, "new": 100})
+
+    comparisons = compare(Baseline.load(path), current, threshold=0.1)
+
+    assert [(c.name, round(c.change, 2), c.regressed) for c in comparisons] == [
+        ("fast", 0.2, False),
+        ("slow", -0.2, True),
+    ]
@@ -9,7 +9,8 @@ from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.deps import get_db
+from src.db import track_database_usage
+from src.deps import get_db, get_read_db, token_cache, user_cache
 from src.main import app as _app
 from src.settings import settings
 from tests.utils import create_test_db, delete_test_db
@@ -18,6 +19,7 @@ test_engine = create_async_engine(settings.postgres_url, echo=True)
 async_session_testing = async_sessionmaker(
     bind=test_engine, expire_on_commit=False, class_=AsyncSession
 )
+track_database_usage(test_engine)
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -49,6 +51,8 @@ async def app() -> AsyncGenerator[FastAPI, Any]:
 
     TODO: migrations should be used instead of creating all tables
     """
+    user_cache.clear()
+    token_cache.clear()
     async with test_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
     yield _app
@@ -68,7 +72,7 @@ async def client(
 ) -> AsyncGenerator[AsyncClient, Any]:
     """
     Create a new FastAPI AsyncClient that uses the `db_session` fixture to override
-    the `get_db` dependency that is injected into routes.
+    the `get_db` and `get_read_db` dependencies that are injected into routes.
     """
 
     async def _get_test_db():
@@ -78,6 +82,7 @@ async def client(
             pass
 
     app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_read_db] = _get_test_db
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://127.0.0.1"
     ) as client:
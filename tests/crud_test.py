@@ -0,0 +1,95 @@
+import uuid
+
+from fastapi import FastAPI
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.crud.user import user_manager
+from src.models import Profile, User
+from tests.utils import create_user
+
+
+async def test_create_many_reports_failed_rows(
+    app: FastAPI, db_session: AsyncSession
+) -> None:
+    """
+    Test that rows violating validation or a constraint are reported by index
+    while all other rows are created.
+    """
+    await create_user(db_session, "taken@example.com", "String123")
+    data = [
+        User(email="user0@example.com", password="hash"),
+        {"email": "not an email", "password": "String123"},
+        User(email="taken@example.com", password="hash"),
+        User(email="user3@example.com", password="hash"),
+    ]
+
+    result = await user_manager.create_many(data, db_session, chunk_size=2)
+
+    assert result.succeeded == 2
+    assert [error.index for error in result.errors] == [1, 2]
+    statement = select(User.email).order_by(col(User.email))
+    emails = (await db_session.exec(statement)).all()
+    assert emails == ["taken@example.com", "user0@example.com", "user3@example.com"]
+
+
+async def test_update_many(app: FastAPI, db_session: AsyncSession) -> None:
+    """
+    Test that objects are updated by their lookup field and missing ones reported.
+    """
+    user = await create_user(db_session, "user@example.com", "String123")
+    other = await create_user(db_session, "other@example.com", "String123")
+    data = [
+        {"id": user.id, "is_active": True},
+        {"id": other.id, "email": "changed@example.com"},
+        {"id": uuid.uuid4(), "is_active": True},
+    ]
+
+    result = await user_manager.update_many(data, db_session)
+
+    assert result.succeeded == 2
+    assert [(error.index, error.detail) for error in result.errors] == [
+        (2, "User not found")
+    ]
+    db_session.expire_all()
+    assert (await db_session.get(User, user.id)).is_active
+    assert (await db_session.get(User, other.id)).email == "changed@example.com"
+
+
+async def test_delete_many(app: FastAPI, db_session: AsyncSession) -> None:
+    """
+    Test that objects are deleted by their lookup field and missing ones reported.
+    """
+    users = [
+        await create_user(db_session, f"user{i}@example.com", "String123")
+        for i in range(3)
+    ]
+    pks = [users[0].id, users[1].id, uuid.uuid4()]
+
+    result = await user_manager.delete_many(pks, db_session)
+
+    assert result.succeeded == 2
+    assert [error.index for error in result.errors] == [2]
+    remaining = (await db_session.exec(select(User.id))).all()
+    assert remaining == [users[2].id]
+
+
+async def test_delete_user_with_profile(app: FastAPI, db_session: AsyncSession) -> None:
+    """
+    Test that deleting a user deletes their profile too.
+    """
+    users = [
+        await create_user(db_session, f"user{i}@example.com", "String123", True)
+        for i in range(2)
+    ]
+    for user in users:
+        db_session.add(Profile(user=user))
+    await db_session.commit()
+    pks = [user.id for user in users]
+
+    await user_manager.delete(pks[0], db_session)
+    result = await user_manager.delete_many(pks[1:], db_session)
+
+    assert result.succeeded == 1
+    assert not result.errors
+    assert (await db_session.exec(select(Profile.id))).all() == []
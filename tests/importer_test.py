@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from fastapi import FastAPI
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.importer import UserImporter, read_records
+from src.models import Profile, User
+from src.settings import pwd_cxt
+from tests.utils import create_user
+
+CSV = """email,password,role,is_active,username
+new@example.com,String123,,,newbie
+existing@example.com,String123,,,
+inactive@example.com,String123,mentor,false,
+new@example.com,String123,,,
+invalid,String123,,,
+"""
+
+
+async def test_import_users(
+    app: FastAPI, db_session: AsyncSession, tmp_path: Path
+) -> None:
+    """
+    Test that users and profiles are imported, skipping existing, repeated and
+    invalid rows.
+    """
+    await create_user(db_session, "existing@example.com", "String123")
+    path = tmp_path / "users.csv"
+    path.write_text(CSV)
+
+    importer = UserImporter(chunk_size=2, workers=1, with_profiles=True, dry_run=False)
+    report = await importer.run(read_records(str(path)))
+
+    assert (report.read, report.imported, report.skipped, report.invalid) == (5, 2, 2, 1)
+    statement = select(User).order_by(col(User.email))
+    users = (await db_session.exec(statement)).all()
+    assert [user.email for user in users] == [
+        "existing@example.com",
+        "inactive@example.com",
+        "new@example.com",
+    ]
+    assert pwd_cxt.verify("String123", users[2].password)
+    assert users[2].is_active and not users[1].is_active
+
+    profiles = (await db_session.exec(select(Profile))).all()
+    assert [(p.user_id, p.username) for p in profiles] == [(users[2].id, "newbie")]
+
+
+async def test_import_users_dry_run(
+    app: FastAPI, db_session: AsyncSession, tmp_path: Path
+) -> None:
+    """
+    Test that a dry run reports the import without writing anything.
+    """
+    path = tmp_path / "users.csv"
+    path.write_text(CSV)
+
+    importer = UserImporter(chunk_size=2, workers=1, with_profiles=True, dry_run=True)
+    report = await importer.run(read_records(str(path)))
+
+    assert report.imported == 3
+    assert (await db_session.exec(select(User))).all() == []
@@ -0,0 +1,103 @@
+import logging
+import queue
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import orjson
+
+from src.logs import DroppingQueueHandler, JSONFormatter, setup_logging
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.ERROR, __file__, 1, message, None, None)
+
+
+def test_full_queue_drops_records() -> None:
+    """
+    Test that records are dropped and counted instead of blocking on a full queue.
+    """
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(make_record(f"error {i}"))
+
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_json_formatter() -> None:
+    """
+    Test that records are formatted as JSON objects.
+    """
+    data = orjson.loads(JSONFormatter().format(make_record("failed")))
+
+    assert data["level"] == "ERROR"
+    assert data["logger"] == "test"
+    assert data["message"] == "failed"
+
+
+def test_setup_logging_writes_through_listener(tmp_path: Path) -> None:
+    """
+    Test that root logger records end up in the log file once the listener stops.
+    """
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    path = tmp_path / "app.log"
+    try:
+        listener = setup_logging(
+            level="WARNING",
+            filename=str(path),
+            json=True,
+            max_bytes=0,
+            backup_count=0,
+            queue_size=10,
+        )
+        logging.info("ignored")
+        logging.error("send %s failed", "mail")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logging.exception("crashed")
+        listener.stop()
+    finally:
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+
+    records = [orjson.loads(line) for line in path.read_text().splitlines()]
+    assert [record["message"] for record in records] == ["send mail failed", "crashed"]
+    assert "exception" not in records[0]
+    assert "ValueError: boom" in records[1]["exception"]
+
+
+def test_setup_logging_multiprocess_uses_stderr(tmp_path: Path) -> None:
+    """
+    Test that several workers log to stderr instead of rotating one file.
+    """
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    path = tmp_path / "app.log"
+    try:
+        with patch("src.logs.MULTIPROCESS", True):
+            listener = setup_logging(
+                level="WARNING",
+                filename=str(path),
+                json=False,
+                max_bytes=0,
+                backup_count=0,
+                queue_size=10,
+            )
+        listener.stop()
+    finally:
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+
+    (handler,) = listener.handlers
+    assert isinstance(handler, logging.StreamHandler)
+    assert handler.stream is sys.stderr
+    assert not path.exists()
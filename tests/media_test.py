@@ -0,0 +1,100 @@
+import gzip
+import os
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, AsyncGenerator, Tuple
+
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from src.media import ENCODINGS, MediaFiles, MediaStore
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg"><circle r="10"/></svg>'
+
+
+@pytest_asyncio.fixture(scope="function")
+async def media(tmp_path: Path) -> AsyncGenerator[Tuple[MediaStore, AsyncClient], Any]:
+    """
+    Create a media store in a temporary directory and a client for its files
+    served at /media.
+    """
+    store = MediaStore(str(tmp_path), suffix=".svg")
+    app = Starlette(routes=[Mount("/media", MediaFiles(store=store))])
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://127.0.0.1"
+    ) as client:
+        yield store, client
+
+
+def url_for(store: MediaStore, path: str) -> str:
+    return f"/media/{os.path.relpath(path, store.root)}"
+
+
+async def test_get_media_cache_headers(media: Tuple[MediaStore, AsyncClient]) -> None:
+    """
+    Test that stored media is served with immutable caching headers and a strong ETag.
+    """
+    store, client = media
+    path = await store.put(SVG)
+
+    response = await client.get(
+        url_for(store, path), headers={"Accept-Encoding": "identity"}
+    )
+
+    assert response.status_code == 200
+    assert response.content == SVG
+    assert response.headers["content-type"] == "image/svg+xml"
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["etag"] == f'"{path.rsplit("/", 1)[-1][:-4]}"'
+    assert "content-encoding" not in response.headers
+
+
+async def test_get_media_not_modified(media: Tuple[MediaStore, AsyncClient]) -> None:
+    """
+    Test that a matching If-None-Match is answered with 304.
+    """
+    store, client = media
+    path = await store.put(SVG)
+    response = await client.get(url_for(store, path))
+
+    response = await client.get(
+        url_for(store, path), headers={"If-None-Match": response.headers["etag"]}
+    )
+
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+async def test_get_media_precompressed(media: Tuple[MediaStore, AsyncClient]) -> None:
+    """
+    Test that the precompressed gzip variant is served when accepted.
+    """
+    store, client = media
+    path = await store.put(SVG)
+
+    response = await client.get(url_for(store, path), headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.content == SVG
+    assert gzip.decompress(open(f"{path}.gz", "rb").read()) == SVG
+
+
+def test_remove_unreferenced_keeps_young_files(tmp_path: Path) -> None:
+    """
+    Test that unreferenced files within the grace period keep their compressed
+    variants, and that older ones are removed with them.
+    """
+    store = MediaStore(str(tmp_path), suffix=".svg")
+    path = store.put_sync(SVG)
+    variants = [path + extension for extension, _ in ENCODINGS.values()]
+
+    assert store._remove_unreferenced(set(), timedelta(days=1)) == 0
+    assert all(os.path.exists(name) for name in [path, *variants])
+
+    os.utime(path, (0, 0))
+    assert store._remove_unreferenced(set(), timedelta(days=1)) == 1
+    assert not any(os.path.exists(name) for name in [path, *variants])
@@ -0,0 +1,48 @@
+from httpx import AsyncClient
+
+
+def sample(metrics: str, name: str) -> float:
+    """
+    Return the value of a sample in Prometheus text format, 0 if missing.
+    """
+    for line in metrics.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+async def test_metrics_count_requests_by_route(client: AsyncClient) -> None:
+    """
+    Test that requests are counted by route template and status code.
+    """
+    name = 'http_requests_total{method="POST",route="/auth/refresh",status="401"}'
+    before = sample((await client.get("/metrics")).text, name)
+
+    await client.post("/auth/refresh")
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert sample(response.text, name) == before + 1
+    assert 'db_pool_size{pool="primary"}' in response.text
+    assert "password_hash_pending" in response.text
+
+
+async def test_metrics_label_mounts_and_plain_routes(client: AsyncClient) -> None:
+    """
+    Test that mounted media and /metrics get their own route labels, apart from
+    requests no route matched.
+    """
+    await client.get("/media/profile/missing.svg")
+    await client.get("/does-not-exist")
+    # A scrape is counted only once it is finished, so it never includes itself.
+    await client.get("/metrics")
+    response = await client.get("/metrics")
+
+    for route, status in (
+        ("/media/profile/{path}", "404"),
+        ("/metrics", "200"),
+        ("unmatched", "404"),
+    ):
+        name = f'http_requests_total{{method="GET",route="{route}",status="{status}"}}'
+        assert sample(response.text, name) >= 1
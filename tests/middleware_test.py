@@ -0,0 +1,47 @@
+import re
+
+from httpx import AsyncClient
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.JWT import JWTToken
+from src.models import Profile
+from tests.utils import create_user
+
+SERVER_TIMING = re.compile(
+    r'db-conn;dur=([\d.]+);desc="(\d+)", db;dur=([\d.]+);desc="(\d+)", app;dur=([\d.]+)'
+)
+
+
+async def test_server_timing_without_queries(client: AsyncClient) -> None:
+    """
+    Test that a route without queries reports no connection checkouts.
+    """
+    response = await client.post("/auth/refresh")
+
+    match = SERVER_TIMING.fullmatch(response.headers["server-timing"])
+    assert match is not None
+    assert match.group(2) == match.group(4) == "0"
+
+
+async def test_server_timing_connection_hold_time(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test that the time pooled connections were held is reported.
+    """
+    user = await create_user(db_session, "user@example.com", "String123", True)
+    db_session.add(Profile(user=user))
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {JWTToken(user.id).get_access_token()}"}
+
+    response = await client.get(f"/profile/{user.id}", headers=headers)
+
+    assert response.status_code == 200
+    match = SERVER_TIMING.fullmatch(response.headers["server-timing"])
+    assert match is not None
+    # The user lookup and the profile read share one connection, which is still
+    # checked out when the headers are sent.
+    assert int(match.group(2)) == 1
+    assert 0 < float(match.group(1)) <= float(match.group(5))
+    assert match.group(4) == "2"
+    assert 0 < float(match.group(3)) <= float(match.group(5))
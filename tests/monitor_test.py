@@ -0,0 +1,62 @@
+import asyncio
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from httpx import AsyncClient
+
+from src.monitor import LoopLagMonitor, loop_lag_monitor
+
+
+def test_loop_lag_rises_at_once_and_decays() -> None:
+    """
+    Test that a lag spike is taken over immediately and forgotten gradually.
+    """
+    monitor = LoopLagMonitor(timedelta(milliseconds=10))
+    monitor.record(0.4)
+    assert monitor.lag == 0.4
+    monitor.record(0.0)
+    assert 0 < monitor.lag < 0.4
+    monitor.record(-0.001)
+    assert monitor.lag >= 0
+
+
+async def test_loop_lag_monitor_measures_blocking() -> None:
+    """
+    Test that blocking the event loop shows up as lag.
+    """
+    monitor = LoopLagMonitor(timedelta(milliseconds=10))
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0)
+    time.sleep(0.1)
+    await asyncio.sleep(0.001)
+    task.cancel()
+    assert monitor.lag >= 0.05
+
+
+async def test_load_shedding(client: AsyncClient) -> None:
+    """
+    Test that requests are rejected while the loop lags, except exempt paths.
+    """
+    with patch.object(loop_lag_monitor, "lag", 10.0):
+        response = await client.get("/profile")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+
+        origin = {"Origin": "http://localhost:3000"}
+        response = await client.get("/profile", headers=origin)
+        assert response.status_code == 503
+        assert response.headers["access-control-allow-origin"] == origin["Origin"]
+
+        preflight = {**origin, "Access-Control-Request-Method": "GET"}
+        response = await client.options("/profile", headers=preflight)
+        assert response.status_code == 200
+
+        response = await client.get("/health")
+        assert response.status_code == 200
+
+        response = await client.post("/auth/refresh")
+        assert response.status_code != 503
+
+    response = await client.get("/profile")
+    assert response.status_code != 503
@@ -3,8 +3,10 @@ from uuid import uuid4
 from httpx import AsyncClient
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.deps import user_cache
 from src.JWT import JWTToken
 from src.models import Profile
+from src.settings import settings
 from tests.utils import create_user
 
 
@@ -33,6 +35,160 @@ async def test_get_profile(client: AsyncClient, db_session: AsyncSession) -> Non
     assert isinstance(profile_data.get("username"), str)
 
 
+async def test_get_profile_cached_user(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test that the authenticated user is served from the user cache on repeated requests.
+    """
+    user = await create_user(
+        db_session, "user@example.com", "Password123", is_active=True
+    )
+    db_session.add(Profile(user=user))
+    await db_session.commit()
+
+    headers = {"Authorization": f"Bearer {JWTToken(user.id).get_access_token()}"}
+
+    response = await client.get(f"/profile/{user.id}", headers=headers)
+    assert response.status_code == 200
+    assert user_cache.misses == 1
+    assert user_cache.hits == 0
+
+    response = await client.get(f"/profile/{user.id}", headers=headers)
+    assert response.status_code == 200
+    assert user_cache.misses == 1
+    assert user_cache.hits == 1
+
+    user_cache.invalidate(user.id)
+    response = await client.get(f"/profile/{user.id}", headers=headers)
+    assert response.status_code == 200
+    assert user_cache.misses == 2
+
+
+async def test_get_profile_not_modified(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test conditional profile retrieval with If-None-Match.
+    """
+    user = await create_user(
+        db_session, "user@example.com", "Password123", is_active=True
+    )
+    profile = Profile(user=user)
+    db_session.add(profile)
+    await db_session.commit()
+
+    headers = {"Authorization": f"Bearer {JWTToken(user.id).get_access_token()}"}
+
+    response = await client.get(f"/profile/{user.id}", headers=headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = await client.get(
+        f"/profile/{user.id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    profile.username = "changed"
+    db_session.add(profile)
+    await db_session.commit()
+
+    response = await client.get(
+        f"/profile/{user.id}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["username"] == "changed"
+
+
+async def test_get_profiles_batch(client: AsyncClient, db_session: AsyncSession) -> None:
+    """
+    Test retrieving several profiles at once, unknown ids are reported as missing.
+    """
+    user = await create_user(
+        db_session, "user@example.com", "Password123", is_active=True
+    )
+    other = await create_user(db_session, "other@example.com", "Password123")
+    db_session.add_all([Profile(user=user), Profile(user=other)])
+    await db_session.commit()
+    unknown = uuid4()
+
+    token = JWTToken(user.id).get_access_token()
+    response = await client.post(
+        "/profile/batch",
+        json={"ids": [str(user.id), str(other.id), str(unknown)]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["profiles"]) == {str(user.id), str(other.id)}
+    assert data["profiles"][str(other.id)]["user_id"] == str(other.id)
+    assert data["missing"] == [str(unknown)]
+
+
+async def test_get_profiles_batch_too_many(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test that batches over the configured size are rejected.
+    """
+    user = await create_user(
+        db_session, "user@example.com", "Password123", is_active=True
+    )
+    token = JWTToken(user.id).get_access_token()
+
+    response = await client.post(
+        "/profile/batch",
+        json={"ids": [str(uuid4()) for _ in range(settings.PROFILE_BATCH_MAX_SIZE + 1)]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 422
+
+
+async def test_list_profiles_paginated(
+    client: AsyncClient, db_session: AsyncSession
+) -> None:
+    """
+    Test listing profiles page by page with the cursor.
+    """
+    users = [
+        await create_user(db_session, f"user{i}@example.com", "Password123", True)
+        for i in range(3)
+    ]
+    db_session.add_all([Profile(user=user) for user in users])
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {JWTToken(users[0].id).get_access_token()}"}
+
+    response = await client.get("/profile", params={"limit": 2}, headers=headers)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 2
+    assert first_page["next_cursor"] is not None
+
+    response = await client.get(
+        "/profile",
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert len(second_page["items"]) == 1
+    assert second_page["next_cursor"] is None
+
+    listed = [item["user_id"] for item in first_page["items"] + second_page["items"]]
+    assert sorted(listed) == sorted(str(user.id) for user in users)
+
+    username = first_page["items"][0]["username"]
+    response = await client.get(
+        "/profile", params={"username": username}, headers=headers
+    )
+    assert [item["username"] for item in response.json()["items"]] == [username]
+
+
 async def test_get_profile_unauthorized(client: AsyncClient) -> None:
     """
     Test retrieving the profile without authentication.
@@ -0,0 +1,101 @@
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.profiler import (
+    ProfilerMiddleware,
+    ProfileStore,
+    StackSampler,
+    sign_profile_request,
+    verify_profile_request,
+)
+from src.settings import settings
+
+
+def test_verify_profile_request() -> None:
+    """
+    Test that only unexpired values signed with the secret are accepted.
+    """
+    expires = int(time.time()) + 60
+    value = sign_profile_request("secret", expires)
+
+    assert verify_profile_request("secret", value)
+    assert not verify_profile_request("other", value)
+    assert not verify_profile_request("secret", f"{expires + 1}.{value.split('.')[1]}")
+    assert not verify_profile_request("secret", sign_profile_request("secret", 1))
+    assert not verify_profile_request("secret", "garbage")
+    assert not verify_profile_request("secret", "9" * 5000 + ".abc")
+    assert not verify_profile_request("secret", f"{expires}.\xe9\xe9")
+    assert not verify_profile_request("secret", "\xb2.abc")
+
+
+def busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stack_sampler_collapses_stacks() -> None:
+    """
+    Test that samples of the sampled thread are counted per collapsed stack.
+    """
+    sampler = StackSampler(threading.get_ident(), timedelta(milliseconds=1))
+    sampler.start()
+    busy_wait(0.05)
+    sampler.stop()
+
+    report = sampler.collapsed()
+    assert "busy_wait" in report
+    stack, count = report.splitlines()[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+
+def test_profile_store_keeps_newest_reports(tmp_path: Path) -> None:
+    """
+    Test that the oldest reports are removed beyond max_reports.
+    """
+    store = ProfileStore(str(tmp_path), max_reports=2)
+    names = [store.new_name("GET", "/profile/1") for _ in range(3)]
+    for name in names:
+        store.save_sync(name, "main 1\n")
+
+    assert [report.name for report in store.list()] == names[:0:-1]
+    assert store.path_for(names[0]) is None
+    assert store.path_for("../settings.py") is None
+
+
+async def slow(request) -> PlainTextResponse:
+    busy_wait(0.02)
+    return PlainTextResponse("done")
+
+
+async def test_profiler_middleware(tmp_path: Path) -> None:
+    """
+    Test that signed requests are profiled and their report is named in the response.
+    """
+    store = ProfileStore(str(tmp_path), max_reports=10)
+    app = ProfilerMiddleware(Starlette(routes=[Route("/slow", slow)]), store=store)
+    value = sign_profile_request("secret", int(time.time()) + 60)
+
+    with patch.object(settings, "PROFILER_SECRET", "secret"):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            plain = await client.get("/slow")
+            forged = await client.get("/slow", headers={"X-Profile": "1.abc"})
+            garbage = await client.get("/slow", headers={"X-Profile": b"\xe9\xff"})
+            profiled = await client.get("/slow", headers={"X-Profile": value})
+
+    assert "X-Profile-Report" not in plain.headers
+    assert "X-Profile-Report" not in forged.headers
+    assert garbage.status_code == 200
+    name = profiled.headers["X-Profile-Report"]
+    assert [report.name for report in store.list()] == [name]
+    assert "slow" in Path(store.path_for(name)).read_text()
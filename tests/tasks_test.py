@@ -0,0 +1,90 @@
+import socket
+from email.message import EmailMessage
+from typing import Any, Generator, List
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from src.smtp import SMTPPool
+
+
+class RecordingHandler:
+    """
+    aiosmtpd handler that keeps received messages and the sessions they came from.
+    """
+
+    def __init__(self) -> None:
+        self.envelopes: List[Any] = []
+        self.sessions: List[Any] = []
+
+    async def handle_DATA(self, server, session, envelope) -> str:
+        self.envelopes.append(envelope)
+        self.sessions.append(session)
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture()
+def smtp_server() -> Generator[Controller, Any, None]:
+    """
+    Local SMTP server standing in for the real mail provider.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    controller = Controller(RecordingHandler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    yield controller
+    controller.stop()
+
+
+def make_pool(controller: Controller) -> SMTPPool:
+    return SMTPPool(
+        hostname=controller.hostname,
+        port=controller.port,
+        username=None,
+        password=None,
+        start_tls=False,
+        max_connections=2,
+        timeout=5,
+        idle_timeout=60,
+    )
+
+
+def make_message(number: int) -> EmailMessage:
+    em = EmailMessage()
+    em["From"] = "sender@example.com"
+    em["To"] = f"user{number}@example.com"
+    em["Subject"] = "Test"
+    em.set_content("Hello")
+    return em
+
+
+async def test_smtp_pool_reuses_connection(smtp_server: Controller) -> None:
+    """
+    Test that several messages are sent over a single SMTP session.
+    """
+    pool = make_pool(smtp_server)
+
+    errors = await pool.send_messages([make_message(i) for i in range(3)])
+    await pool.send_message(make_message(3))
+    await pool.close()
+
+    assert errors == [None, None, None]
+    assert len(smtp_server.handler.envelopes) == 4
+    assert len({id(session) for session in smtp_server.handler.sessions}) == 1
+
+
+async def test_smtp_pool_reconnects(smtp_server: Controller) -> None:
+    """
+    Test that a connection dropped by the server is reopened transparently.
+    """
+    pool = make_pool(smtp_server)
+
+    await pool.send_message(make_message(0))
+    client, _ = pool._idle[0]
+    client.close()
+    await pool.send_message(make_message(1))
+    await pool.close()
+
+    assert len(smtp_server.handler.envelopes) == 2
+    assert len({id(session) for session in smtp_server.handler.sessions}) == 2
@@ -1,7 +1,11 @@
+from contextlib import contextmanager
+from typing import Iterator
+
 from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.db import DatabaseStats, database_stats
 from src.models import User
 from src.settings import engine, pwd_cxt
 
@@ -44,3 +48,21 @@ async def delete_test_db(db_name: str):
         print(f"Error occurred: {e}")
     finally:
         await engine.dispose()
+
+
+@contextmanager
+def assert_max_queries(max_queries: int) -> Iterator[DatabaseStats]:
+    """
+    Assert that at most max_queries statements are executed inside the block,
+    including statements of requests sent with the test client.
+    """
+    stats = DatabaseStats(parent=database_stats.get())
+    token = database_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        database_stats.reset(token)
+    statements = "\n".join(stats.statements)
+    assert (
+        stats.queries <= max_queries
+    ), f"{stats.queries} queries executed, expected at most {max_queries}:\n{statements}"
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from aiosmtplib import SMTPRecipientsRefused
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models import Outbox, OutboxStatus
+from src.models.utils import utcnow
+from src.settings import settings
+from src.worker import process_outbox_batch
+
+
+async def test_process_outbox_batch_sends_pending(db_session: AsyncSession) -> None:
+    """
+    Test that due outbox rows are sent and marked as sent.
+    """
+    outbox = Outbox(recipient="user@example.com", subject="Subject", body="<p>Hi</p>")
+    later = Outbox(
+        recipient="later@example.com",
+        subject="Subject",
+        body="<p>Hi</p>",
+        next_attempt_at=utcnow() + timedelta(hours=1),
+    )
+    db_session.add_all([outbox, later])
+    await db_session.commit()
+
+    async def send_messages(messages):
+        # The claim is committed, no locks or connection are held while sending.
+        assert not db_session.in_transaction()
+        return [None] * len(messages)
+
+    with patch("src.worker.smtp_pool.send_messages", side_effect=send_messages):
+        processed = await process_outbox_batch(db_session)
+
+    assert processed == 1
+    await db_session.refresh(outbox)
+    await db_session.refresh(later)
+    assert outbox.status == OutboxStatus.sent
+    assert outbox.sent_at is not None
+    assert later.status == OutboxStatus.pending
+
+
+async def test_process_outbox_batch_retries_with_backoff(
+    db_session: AsyncSession,
+) -> None:
+    """
+    Test that a failed row is rescheduled and eventually marked as failed.
+    """
+    outbox = Outbox(recipient="user@example.com", subject="Subject", body="<p>Hi</p>")
+    db_session.add(outbox)
+    await db_session.commit()
+
+    error = SMTPRecipientsRefused([])
+    with patch(
+        "src.worker.smtp_pool.send_messages", new_callable=AsyncMock
+    ) as send_messages:
+        send_messages.return_value = [error]
+        await process_outbox_batch(db_session)
+
+        await db_session.refresh(outbox)
+        assert outbox.status == OutboxStatus.pending
+        assert outbox.attempts == 1
+        assert outbox.next_attempt_at > utcnow()
+
+        outbox.attempts = settings.OUTBOX_MAX_ATTEMPTS - 1
+        outbox.next_attempt_at = utcnow()
+        db_session.add(outbox)
+        await db_session.commit()
+        await process_outbox_batch(db_session)
+
+    await db_session.refresh(outbox)
+    assert outbox.status == OutboxStatus.failed
+    assert outbox.last_error is not None